@@ -1,16 +1,32 @@
-from flask import request, session, render_template, send_from_directory
-import os
+from flask import request, session, render_template, stream_with_context
+import re
 from flask_restful import Resource, abort
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import select
+from sqlalchemy import select, insert
+from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 from config import app, db, api
-from models import User, Game, Player, Session, Character
+from models import User, Game, Player, Session, Character, refresh_game_stats
 from schemas import UserSchema, GameSchema, PlayerSchema, SessionSchema, CharacterSchema
 from marshmallow import ValidationError
+from pagination import page_args, paginate
+from instrumentation import query_budget
+from routing import read_replica
+import sqlite_mode  # SQLite pragmas and the writer lock (connection events)
+import compression  # gzip/brotli for API responses (after_request hook)
+from assets import lookup, send
+from etags import user_etag, etag_headers, not_modified
+from fragment_cache import game_fragments, encode
+from export import export_lines, gzip_stream
+from importer import CampaignImport, read_rows, open_upload
+from changelog import CursorExpired, sync_cursor, read_cursor, latest_entry_id, changes_since
+from passwords import PasswordHasherBusy
+from search import search, parse_query
+from character_filters import parse_filters, parse_sort, characters_for, facet_counts
+from stats import user_stats
 
-game_schema = GameSchema()
-games_schema = GameSchema(many=True)
 player_schema = PlayerSchema()
+player_summary_schema = PlayerSchema(exclude=('characters',))
 session_schema = SessionSchema()
 character_schema = CharacterSchema()
 characters_schema = CharacterSchema(many=True)
@@ -22,7 +38,7 @@ def login_check():
     if request.method == 'OPTIONS':
         return
     # Paths that never require auth
-    open_paths = ['/', '/signup', '/login', '/check_session', '/logout', '/manifest.json']
+    open_paths = ['/', '/signup', '/login', '/check_session', '/logout', '/manifest.json', '/metrics']
     # Allow static assets and favicon through without auth
     if request.path.startswith('/static/') or request.path == '/favicon.ico':
         return
@@ -32,6 +48,7 @@ def login_check():
         return {'error': '401 unauthorized'}, 401
 
 class Signup(Resource):
+    @query_budget(3)
     def post(self):
         data = request.get_json()
         username = data.get('username')
@@ -40,8 +57,17 @@ class Signup(Resource):
         if not username or not password:
             return {'error': 'Username and password required'}, 400
 
-        user = User(username=username)
-        user.password_hash = password
+        try:
+            schema, _ = UserSchema.from_request(request.args)
+        except ValueError as err:
+            return {'error': str(err)}, 400
+
+        # A brand-new user has no games, so mark the collection as loaded
+        user = User(username=username, games=[])
+        try:
+            user.password_hash = password
+        except PasswordHasherBusy as err:
+            return {'error': str(err)}, 503, {'Retry-After': '1'}
         try:
             db.session.add(user)
             db.session.commit()
@@ -50,111 +76,232 @@ class Signup(Resource):
             return {'error': 'Username already exists'}, 409
 
         session['user_id'] = user.id
-        return UserSchema().dump(user), 201
+        return schema.dump(user), 201
 
 class Login(Resource):
+    @query_budget(7)
     def post(self):
         data = request.get_json()
         username = data.get('username')
         password = data.get('password')
 
-        user = User.query.filter_by(username=username).first()
-        if user and user.authenticate(password):
+        try:
+            schema, options = UserSchema.from_request(request.args)
+        except ValueError as err:
+            return {'error': str(err)}, 400
+
+        user = User.query.filter_by(username=username).options(*options).first()
+        try:
+            authenticated = user is not None and user.authenticate(password)
+            # Upgrade the stored hash when BCRYPT_LOG_ROUNDS has changed
+            if authenticated and user.password_needs_rehash():
+                user.password_hash = password
+                db.session.commit()
+        except PasswordHasherBusy as err:
+            return {'error': str(err)}, 503, {'Retry-After': '1'}
+        if authenticated:
             session['user_id'] = user.id
-            return UserSchema().dump(user), 200
+            return schema.dump(user), 200
         return {'error': 'Invalid username or password'}, 401
 
 class CheckSession(Resource):
+    @read_replica
+    @query_budget(6)
     def get(self):
         user_id = session.get('user_id')
         if not user_id:
             return {'error': '401 unauthorized'}, 401
-        user = db.session.get(User, user_id)
+        try:
+            schema, options = UserSchema.from_request(request.args)
+        except ValueError as err:
+            return {'error': str(err)}, 400
+        # Polling clients send If-None-Match and skip the whole graph
+        etag = user_etag(user_id)
+        unchanged = not_modified(etag)
+        if unchanged:
+            return unchanged
+        user = db.session.get(User, user_id, options=options)
         if not user:
             abort(404, message=f"User with id {user_id} not found")
-        return UserSchema().dump(user), 200
+        return schema.dump(user), 200, etag_headers(etag)
 
 class Logout(Resource):
     def delete(self):
         session['user_id'] = None
         return {}, 204
 
+def load_assignments(assignments):
+    """
+    Validate the nested assignments of POST /games as one batch.
+    Each assignment is {'player_id': id, 'character': {...}} for an existing
+    player or {'player': {...}, 'character': {...}} for a new one; anything
+    else is skipped. Returns (player_rows, character_rows, existing_players,
+    errors) where errors maps an assignment's index to its messages. A
+    character row for a new player carries 'new_player', the index of its
+    row in player_rows.
+    """
+    keep = [(i, a) for i, a in enumerate(assignments) if 'player_id' in a or 'player' in a]
+    errors = {}
+    new_player_of = {}  # assignment index -> index in player_rows
+    player_info = []
+    char_info = []
+    for i, assign in keep:
+        info = dict(assign.get('character') or {})
+        if 'player_id' in assign:
+            info['player_id'] = assign['player_id']
+        else:
+            new_player_of[i] = len(player_info)
+            player_info.append(assign['player'] or {})
+        char_info.append(info)
+
+    try:
+        player_rows = player_schema.load(player_info, many=True)
+    except ValidationError as err:
+        by_row = {row: i for i, row in new_player_of.items()}
+        for row, messages in err.messages.items():
+            errors.setdefault(by_row[row], {})['player'] = messages
+        player_rows = []
+    try:
+        # Foreign keys are filled in once the game and players exist
+        char_rows = character_schema.load(char_info, many=True, partial=('player_id', 'game_id'))
+    except ValidationError as err:
+        for row, messages in err.messages.items():
+            errors.setdefault(keep[row][0], {})['character'] = messages
+        char_rows = []
+    if errors:
+        return [], [], {}, errors
+
+    player_ids = {row['player_id'] for row in char_rows if 'player_id' in row}
+    existing = {}
+    if player_ids:
+        existing = {p.id: p for p in db.session.scalars(select(Player).where(Player.id.in_(player_ids)))}
+    for (i, _), row in zip(keep, char_rows):
+        if i in new_player_of:
+            row['new_player'] = new_player_of[i]
+        elif row['player_id'] not in existing:
+            errors[i] = {'character': {'player_id': ['Player not found.']}}
+        # Same keys on every row (matching the column defaults) so each
+        # table gets a single multi-row INSERT
+        row.setdefault('icon', None)
+        row.setdefault('is_active', True)
+    for row in player_rows:
+        row.setdefault('summary', None)
+    return player_rows, char_rows, existing, errors
+
 class NewGame(Resource):
+    @read_replica
+    @query_budget(5)
     def get(self):
+        # Keyset pagination: ?limit=N&cursor=<next_cursor from previous page>
+        # ?expand= / ?fields= control how much of each game is serialized
+        # Each game's JSON comes from the fragment cache when its version is unchanged
         user_id = session.get('user_id')
+        try:
+            limit, after = page_args()
+            schema, options = GameSchema.from_request(request.args, many=True)
+        except ValueError as err:
+            return {'error': str(err)}, 400
+        etag = user_etag(user_id)
+        unchanged = not_modified(etag)
+        if unchanged:
+            return unchanged
+        # The page query loads bare game rows; relationships are only loaded for cache misses
         stmt = select(Game).filter_by(user_id=user_id)
-        result = db.session.execute(stmt)  # execute SQL statement
-        games = result.scalars().all()     # load ORM objects
-        return games_schema.dump(games), 200
-
+        try:
+            games, next_cursor = paginate(stmt, (Game.id,), limit, after)
+        except ValueError as err:
+            return {'error': str(err)}, 400
+        body = b''.join([
+            b'{"games":[', b','.join(game_fragments(schema, games, options)),
+            b'],"next_cursor":', encode(next_cursor), b'}\n',
+        ])
+        return app.response_class(body, 200, etag_headers(etag), mimetype='application/json')
+
+    @query_budget(7)
     def post(self):
         data = request.get_json() or {}
         # Extract nested assignments if provided
         assignments = data.pop('assignments', [])
         data['user_id'] = session.get('user_id')
         try:
-            loaded = game_schema.load(data)
+            schema, _ = GameSchema.from_request(request.args)
+        except ValueError as err:
+            return {'error': str(err)}, 400
+        try:
+            # GameSchema keeps per-dump state, so instances are never shared between requests
+            loaded = GameSchema().load(data)
         except ValidationError as err:
             return {'errors': err.messages}, 400
+        # Validate every assignment before writing anything
+        player_rows, char_rows, existing, errors = load_assignments(assignments)
+        if errors:
+            return {'errors': {'assignments': errors}}, 400
+
         new_game = Game(**loaded)
         db.session.add(new_game)
-        # If assignments exist, flush game then handle nested creates
-        if assignments:
-            db.session.flush()
-            db.session.refresh(new_game)
-            for assign in assignments:
-                # existing player case
-                if 'player_id' in assign:
-                    char_info = assign.get('character', {})
-                    char_info['player_id'] = assign['player_id']
-                    char_info['game_id'] = new_game.id
-                    try:
-                        loaded_char = character_schema.load(char_info)
-                    except ValidationError as err:
-                        db.session.rollback()
-                        return {'errors': err.messages}, 400
-                    db.session.add(Character(**loaded_char))
-                # new player + character case
-                elif 'player' in assign:
-                    player_info = assign['player'] or {}
-                    try:
-                        loaded_player = player_schema.load(player_info)
-                    except ValidationError as err:
-                        db.session.rollback()
-                        return {'errors': err.messages}, 400
-                    new_player = Player(**loaded_player)
-                    db.session.add(new_player)
-                    db.session.flush()
-                    db.session.refresh(new_player)
-                    char_info = assign.get('character', {})
-                    char_info['player_id'] = new_player.id
-                    char_info['game_id'] = new_game.id
-                    try:
-                        loaded_char = character_schema.load(char_info)
-                    except ValidationError as err:
-                        db.session.rollback()
-                        return {'errors': err.messages}, 400
-                    db.session.add(Character(**loaded_char))
-                # otherwise skip
-        # finalize transaction
+        db.session.flush()
+        # One multi-row INSERT ... RETURNING each for players and characters.
+        # render_nulls keeps None values in the row so batches never split.
+        new_players = []
+        if player_rows:
+            # Asking for the rows back in parameter order would cost one INSERT
+            # per player on SQLite, which has no insert sentinel. They come back
+            # in any order instead and are paired with player_rows by content;
+            # identical rows are interchangeable, so those go out lowest id first.
+            returned = db.session.scalars(
+                insert(Player).returning(Player).execution_options(render_nulls=True), player_rows
+            ).all()
+            by_content = {}
+            for player in sorted(returned, key=lambda p: p.id):
+                by_content.setdefault((player.name, player.summary), []).append(player)
+            new_players = [by_content[row['name'], row['summary']].pop(0) for row in player_rows]
+        for row in char_rows:
+            row['game_id'] = new_game.id
+            new_index = row.pop('new_player', None)
+            if new_index is not None:
+                row['player_id'] = new_players[new_index].id
+        characters = []
+        if char_rows:
+            characters = db.session.scalars(
+                insert(Character).returning(Character).execution_options(render_nulls=True), char_rows
+            ).all()
+        # The bulk INSERTs skip the flush hooks that keep game_stats current
+        refresh_game_stats(db.session, {new_game.id})
         db.session.commit()
-        return game_schema.dump(new_game), 201
+
+        # Everything the response needs is already in memory; attach it
+        # without marking anything dirty or issuing lazy loads
+        players = {p.id: p for p in new_players}
+        players.update(existing)
+        for char in characters:
+            set_committed_value(char, 'player', players[char.player_id])
+        for player in new_players:
+            set_committed_value(player, 'characters', [c for c in characters if c.player_id == player.id])
+        set_committed_value(new_game, 'sessions', [])
+        set_committed_value(new_game, 'characters', characters)
+        return schema.dump(new_game), 201
 
 class EditGame(Resource):
+    @query_budget(6)
     def patch(self, game_id):
-        game = db.session.get(Game, game_id)
+        try:
+            schema, options = GameSchema.from_request(request.args)
+        except ValueError as err:
+            return {'error': str(err)}, 400
+        game = db.session.get(Game, game_id, options=options)
         if not game:
             abort(404, message=f"Game with id {game_id} not found")
         updates = request.get_json()
         try:
-            loaded_updates = game_schema.load(updates, partial=True)
+            loaded_updates = GameSchema().load(updates, partial=True)
         except ValidationError as err:
             return {'errors': err.messages}, 400
         for key, value in loaded_updates.items():
             setattr(game, key, value)
         db.session.commit()
-        return game_schema.dump(game), 200
+        return schema.dump(game), 200
 
+    @query_budget(9)
     def delete(self, game_id):
         game = db.session.get(Game, game_id)
         if not game:
@@ -184,14 +331,22 @@ class NewPlayer(Resource):
     """
     Resource for creating and listing players independently of games.
     POST /players  -> create a new unattached player.
-    GET /players   -> list all players for the current user.
+    GET /players   -> page through the players in the current user's games.
     """
+    @read_replica
+    @query_budget(2)
     def get(self):
-        # Optionally implement listing if desired
-        user_id = session.get('user_id')
-        players = db.session.query(Player).filter_by(user_id=user_id).all()
-        return PlayerSchema.dump(players), 200
-
+        # Keyset pagination like GET /games; ?expand= controls characters
+        try:
+            limit, after = page_args()
+            schema, options = PlayerSchema.from_request(request.args, many=True)
+            stmt = Player.roster_for(session.get('user_id')).options(*options)
+            players, next_cursor = paginate(stmt, (Player.id,), limit, after)
+        except ValueError as err:
+            return {'error': str(err)}, 400
+        return {'players': schema.dump(players), 'next_cursor': next_cursor}, 200
+
+    @query_budget(1)
     def post(self):
         # Create a new Player alone (no game assignment)
         data = request.get_json() or {}
@@ -199,14 +354,19 @@ class NewPlayer(Resource):
             loaded = player_schema.load(data)
         except ValidationError as err:
             return {'errors': err.messages}, 400
-        new_player = Player(**loaded)
+        new_player = Player(characters=[], **loaded)
         db.session.add(new_player)
         db.session.commit()
         return player_schema.dump(new_player), 201
 
 class EditPlayer(Resource):
+    @query_budget(5)
     def patch(self, player_id):
-        player = db.session.get(Player, player_id)
+        try:
+            schema, options = PlayerSchema.from_request(request.args)
+        except ValueError as err:
+            return {'error': str(err)}, 400
+        player = db.session.get(Player, player_id, options=options)
         if not player:
             abort(404, message=f"Player with id {player_id} not found")
         updates = request.get_json()
@@ -217,8 +377,9 @@ class EditPlayer(Resource):
         for key, value in loaded_updates.items():
             setattr(player, key, value)
         db.session.commit()
-        return player_schema.dump(player), 200
+        return schema.dump(player), 200
 
+    @query_budget(7)
     def delete(self, player_id):
         player = db.session.get(Player, player_id)
         if not player:
@@ -228,6 +389,7 @@ class EditPlayer(Resource):
         return '', 204
 
 class NewSession(Resource):
+    @query_budget(5)
     def post(self, game_id):
         game = db.session.get(Game, game_id)
         if not game:
@@ -246,8 +408,12 @@ class NewSession(Resource):
         return session_schema.dump(new_session), 201
 
 class EditSession(Resource):
+    # Ownership checks need the parent game
+    options = (joinedload(Session.game),)
+
+    @query_budget(5)
     def patch(self, session_id):
-        sess = db.session.get(Session, session_id)
+        sess = db.session.get(Session, session_id, options=self.options)
         if not sess:
             abort(404, message=f"Session with id {session_id} not found")
         if sess.game.user_id != session.get('user_id'):
@@ -262,8 +428,9 @@ class EditSession(Resource):
         db.session.commit()
         return session_schema.dump(sess), 200
 
+    @query_budget(5)
     def delete(self, session_id):
-        sess = db.session.get(Session, session_id)
+        sess = db.session.get(Session, session_id, options=self.options)
         if not sess:
             abort(404, message=f"Session with id {session_id} not found")
         if sess.game.user_id != session.get('user_id'):
@@ -273,6 +440,7 @@ class EditSession(Resource):
         return '', 204
 
 class NewCharacter(Resource):
+    @query_budget(5)
     def post(self, player_id):
         player = db.session.get(Player, player_id)
         if not player:
@@ -289,6 +457,7 @@ class NewCharacter(Resource):
         return character_schema.dump(new_char), 201
         
 class EditCharacter(Resource):
+    @query_budget(5)
     def patch(self, character_id):
         char = db.session.get(Character, character_id)
         if not char:
@@ -303,6 +472,7 @@ class EditCharacter(Resource):
         db.session.commit()
         return character_schema.dump(char), 200
     
+    @query_budget(5)
     def delete(self, character_id):
         char = db.session.get(Character, character_id)
         if not char:
@@ -312,6 +482,7 @@ class EditCharacter(Resource):
         return '', 204
     
 class NewPlayerAndCharacter(Resource):
+    @query_budget(7)
     def post(self, game_id):
         # Use SQLAlchemy 2.0 session.get and abort on missing game
         game = db.session.get(Game, game_id)
@@ -352,14 +523,278 @@ class NewPlayerAndCharacter(Resource):
         # 5) Commit both creations atomically
         db.session.commit()
 
-        # 6) Build the response
-        result = player_schema.dump(new_player)
-        # Remove the full characters list so we only return the new character
-        result.pop('characters', None)
+        # 6) Build the response, returning only the new character
+        result = player_summary_schema.dump(new_player)
         if new_char:
             result['character'] = character_schema.dump(new_char)
         return result, 201
 
+# Operations accepted by POST /batch: (method, path pattern, target kind)
+BATCH_ROUTES = [
+    ('PATCH', re.compile(r'^/characters/(\d+)$'), 'character'),
+    ('PATCH', re.compile(r'^/sessions/(\d+)$'), 'session'),
+    ('POST', re.compile(r'^/games/(\d+)/sessions$'), 'game'),
+    ('PATCH', re.compile(r'^/players/(\d+)$'), 'player'),
+]
+MAX_BATCH_OPERATIONS = 500
+
+class Batch(Resource):
+    """
+    Apply many edits in one request and one transaction:
+    {"operations": [{"method": "PATCH", "path": "/characters/3", "body": {...}}, ...]}
+    Supported operations behave like PATCH /characters/<id>, PATCH /sessions/<id>,
+    POST /games/<id>/sessions and PATCH /players/<id>. The response lists
+    {"status", "body"} for each operation in order; failed operations are
+    skipped and the rest are committed together.
+    """
+    # Model and loader options used to fetch each kind of target
+    targets = {
+        'character': (Character, ()),
+        'session': (Session, (joinedload(Session.game),)),
+        'game': (Game, ()),
+        'player': (Player, (selectinload(Player.characters),)),
+    }
+
+    # No query budget: flush statements depend on which columns each batch touches
+    def post(self):
+        data = request.get_json() or {}
+        operations = data.get('operations') if isinstance(data, dict) else None
+        if not isinstance(operations, list):
+            return {'errors': {'operations': ['Must be a list of operations.']}}, 400
+        if len(operations) > MAX_BATCH_OPERATIONS:
+            return {'errors': {'operations': [f'At most {MAX_BATCH_OPERATIONS} operations per batch.']}}, 400
+
+        parsed = [self.parse(op) for op in operations]
+        # Load every target row with one query per table
+        wanted = {}
+        for kind, target_id, _ in parsed:
+            if kind:
+                wanted.setdefault(kind, set()).add(target_id)
+        loaded = {}
+        for kind, ids in wanted.items():
+            model, options = self.targets[kind]
+            stmt = select(model).where(model.id.in_(ids)).options(*options)
+            loaded[kind] = {obj.id: obj for obj in db.session.scalars(stmt).unique()}
+
+        user_id = session.get('user_id')
+        results = []
+        for kind, target_id, body in parsed:
+            if kind is None:
+                results.append((400, {'error': body}))
+                continue
+            target = loaded[kind].get(target_id)
+            results.append(getattr(self, f'apply_{kind}')(target, target_id, body, user_id))
+
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return {'error': 'Batch could not be saved; no operations were applied'}, 409
+        # Dump after the commit so new sessions have their ids
+        return {'results': [
+            {'status': status, 'body': result[0].dump(result[1]) if isinstance(result, tuple) else result}
+            for status, result in results
+        ]}, 200
+
+    @staticmethod
+    def parse(op):
+        """Return (kind, target id, body), or (None, None, error message)."""
+        if not isinstance(op, dict):
+            return None, None, 'Operation must be an object'
+        method = str(op.get('method', '')).upper()
+        path = str(op.get('path', ''))
+        for route_method, pattern, kind in BATCH_ROUTES:
+            match = pattern.match(path)
+            if match and method == route_method:
+                return kind, int(match.group(1)), op.get('body') or {}
+        return None, None, f'Unsupported operation {method} {path}'
+
+    @staticmethod
+    def apply_character(char, character_id, body, user_id):
+        if not char:
+            return 404, {'message': f"Character with id {character_id} not found"}
+        try:
+            loaded = character_schema.load(body, partial=True)
+        except ValidationError as err:
+            return 400, {'errors': err.messages}
+        for key, value in loaded.items():
+            setattr(char, key, value)
+        return 200, (character_schema, char)
+
+    @staticmethod
+    def apply_session(sess, session_id, body, user_id):
+        if not sess:
+            return 404, {'message': f"Session with id {session_id} not found"}
+        if sess.game.user_id != user_id:
+            return 401, {'error': '401 unauthorized'}
+        try:
+            loaded = session_schema.load(body, partial=True)
+        except ValidationError as err:
+            return 400, {'errors': err.messages}
+        for key, value in loaded.items():
+            setattr(sess, key, value)
+        return 200, (session_schema, sess)
+
+    @staticmethod
+    def apply_game(game, game_id, body, user_id):
+        # POST /games/<id>/sessions
+        if not game:
+            return 404, {'message': f"Game with id {game_id} not found"}
+        if game.user_id != user_id:
+            return 401, {'error': '401 unauthorized'}
+        try:
+            loaded = session_schema.load(dict(body, game_id=game_id) if isinstance(body, dict) else body)
+        except ValidationError as err:
+            return 400, {'errors': err.messages}
+        new_session = Session(**loaded)
+        db.session.add(new_session)
+        return 201, (session_schema, new_session)
+
+    @staticmethod
+    def apply_player(player, player_id, body, user_id):
+        if not player:
+            return 404, {'message': f"Player with id {player_id} not found"}
+        try:
+            loaded = player_schema.load(body, partial=True)
+        except ValidationError as err:
+            return 400, {'errors': err.messages}
+        for key, value in loaded.items():
+            setattr(player, key, value)
+        return 200, (player_schema, player)
+
+class Sync(Resource):
+    """
+    GET /sync?since=<cursor> returns what changed for the current user since
+    the cursor: {"changes": [...], "cursor": ..., "has_more": bool}. Without
+    ?since= it only returns a cursor for the current state, so clients fetch
+    one before /check_session and poll with it afterwards.
+    """
+    # Log read and row snapshots for each kind of entity
+    @query_budget(7)
+    def get(self):
+        user_id = session.get('user_id')
+        since = request.args.get('since')
+        if not since:
+            return {'changes': [], 'cursor': sync_cursor(latest_entry_id(user_id)), 'has_more': False}, 200
+        try:
+            last_id = read_cursor(since)
+        except CursorExpired as err:
+            return {'error': str(err)}, 410
+        except ValueError as err:
+            return {'error': str(err)}, 400
+        changes, last_id, has_more = changes_since(user_id, last_id)
+        return {'changes': changes, 'cursor': sync_cursor(last_id), 'has_more': has_more}, 200
+
+class Export(Resource):
+    """
+    GET /export streams the current user's games, sessions, players and
+    characters as NDJSON (see export.py), gzipped on the fly when the client
+    accepts it. Queries run while the body streams, after the request hooks,
+    so they are not covered by a query budget.
+    """
+    @read_replica
+    def get(self):
+        chunks = export_lines(session.get('user_id'))
+        headers = {
+            'Content-Disposition': 'attachment; filename="campaign-archive.ndjson"',
+            'Vary': 'Accept-Encoding',
+        }
+        if 'gzip' in request.accept_encodings:
+            chunks = gzip_stream(chunks)
+            headers['Content-Encoding'] = 'gzip'
+        return app.response_class(
+            stream_with_context(chunks), 200, headers, mimetype='application/x-ndjson')
+
+class Import(Resource):
+    """
+    POST /import bulk-loads sessions and characters into the user's games
+    from an NDJSON or CSV body (see importer.py), streamed and optionally
+    gzipped. ?format=csv|ndjson (default from Content-Type), ?type= for rows
+    without a type column, ?game_id= to send every row to one game. Returns
+    counts of what was imported plus row-level errors.
+    """
+    # No query budget: statements grow with the number of chunks
+    def post(self):
+        fmt = request.args.get('format') or ('csv' if request.mimetype == 'text/csv' else 'ndjson')
+        default_type = request.args.get('type')
+        if fmt not in ('csv', 'ndjson'):
+            return {'error': "format must be 'csv' or 'ndjson'"}, 400
+        if default_type not in (None, 'session', 'character'):
+            return {'error': "type must be 'session' or 'character'"}, 400
+        game_id = request.args.get('game_id', type=int)
+        stream = open_upload(request.stream, request.headers.get('Content-Encoding'))
+        job = CampaignImport(session.get('user_id'), game_id=game_id, default_type=default_type)
+        return job.run(read_rows(stream, fmt)), 200
+
+class Search(Resource):
+    """
+    GET /search?q=<words> ranks full-text matches across the user's session
+    summaries, game descriptions and settings, and roster player summaries
+    (see search.py). Keyset-paginated like /games: ?limit= and ?cursor=.
+    """
+    # Match query plus one load per kind of result
+    @read_replica
+    @query_budget(4)
+    def get(self):
+        words = parse_query(request.args.get('q'))
+        if not words:
+            return {'error': 'q must contain at least one word'}, 400
+        try:
+            limit, after = page_args()
+            results, next_cursor = search(session.get('user_id'), words, limit, after)
+        except ValueError as err:
+            return {'error': str(err)}, 400
+        except NotImplementedError as err:
+            return {'error': str(err)}, 501
+        return {'results': results, 'next_cursor': next_cursor}, 200
+
+class Characters(Resource):
+    """
+    GET /characters pages through the characters in the user's games with
+    server-side filters (?character_class=, ?game_id= as comma-separated
+    lists; ?player_id=, ?level_min=, ?level_max=, ?is_active=) and ?sort=
+    (name, level, character_class or id; -key for descending). The first
+    page (no ?cursor=) also carries facet counts per class and per game.
+    """
+    # Page query plus the two facet aggregates on the first page
+    @read_replica
+    @query_budget(3)
+    def get(self):
+        # The client has a /characters page too; browser navigation gets the React app
+        if request.accept_mimetypes.best == 'text/html':
+            return app.response_class(render_template('index.html'), mimetype='text/html')
+        user_id = session.get('user_id')
+        try:
+            limit, after = page_args()
+            filters = parse_filters(request.args)
+            key_columns, descending = parse_sort(request.args.get('sort'))
+            characters, next_cursor = paginate(
+                characters_for(user_id, filters), key_columns, limit, after, descending)
+        except ValueError as err:
+            return {'error': str(err)}, 400
+        body = {'characters': characters_schema.dump(characters), 'next_cursor': next_cursor}
+        if after is None:
+            body['facets'] = facet_counts(user_id, filters)
+        return body, 200
+
+class Stats(Resource):
+    """
+    GET /stats returns the dashboard numbers for each of the user's games
+    (session count, last session date, active characters, average party
+    level) and totals across them, from the precomputed game_stats table.
+    Tagged with the same ETag as /games, since every change behind the
+    numbers bumps a game or user version.
+    """
+    @read_replica
+    @query_budget(2)
+    def get(self):
+        user_id = session.get('user_id')
+        etag = user_etag(user_id)
+        unchanged = not_modified(etag)
+        if unchanged:
+            return unchanged
+        return user_stats(user_id), 200, etag_headers(etag)
+
 
 # Register RESTful resources
 api.add_resource(Signup, '/signup')
@@ -375,6 +810,13 @@ api.add_resource(EditSession, '/sessions/<int:session_id>')
 api.add_resource(NewCharacter, '/players/<int:player_id>/characters')
 api.add_resource(EditCharacter, '/characters/<int:character_id>')
 api.add_resource(NewPlayerAndCharacter, '/games/<int:game_id>/players')
+api.add_resource(Batch, '/batch')
+api.add_resource(Sync, '/sync')
+api.add_resource(Export, '/export')
+api.add_resource(Import, '/import')
+api.add_resource(Search, '/search')
+api.add_resource(Characters, '/characters')
+api.add_resource(Stats, '/stats')
 # Removed RPC-style assignments endpoint; use POST /games instead
 
 # Serve React app for client-side routing and static assets
@@ -382,11 +824,13 @@ api.add_resource(NewPlayerAndCharacter, '/games/<int:game_id>/players')
 @app.route('/<path:path>')
 def serve_react(path):
     # if the requested path matches a file in the build directory, serve it
-    full_path = os.path.join(app.static_folder, path)
-    if path and os.path.exists(full_path):
-        return send_from_directory(app.static_folder, path)
+    # (from the manifest scanned at startup, see assets.py)
+    asset = lookup(path) if path else None
+    if asset is not None:
+        return send(asset)
     # otherwise serve index.html for React routing
-    return render_template('index.html')
+    index = lookup('index.html')
+    return send(index) if index is not None else render_template('index.html')
 
 if __name__ == '__main__':
     app.run(port=5555, debug=True)
\ No newline at end of file
@@ -0,0 +1,209 @@
+"""
+ASGI entry point, for serving the API from an event loop:
+
+    uvicorn asgi:application --host 0.0.0.0 --port 5555 --workers 4
+
+Clients poll /check_session and GET /games with If-None-Match (see
+etags.py). Those revalidations are answered on the event loop with one query
+through an async engine (aiosqlite or asyncpg), so a poll never occupies a
+thread. Every other request, and every poll whose data changed, runs the
+Flask app on a pool of ASGI_THREADS threads per process. uvicorn and both
+drivers are in requirements.txt.
+"""
+import asyncio
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import SpooledTemporaryFile
+from time import perf_counter, time
+from itsdangerous import BadSignature
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from werkzeug.http import parse_cookie, parse_etags
+from app import app as flask_app
+from etags import etag_query, format_etag, etag_headers
+from instrumentation import request_duration
+from routing import REPLICA_BIND
+
+# Async driver for each database backend
+ASYNC_DRIVERS = {'sqlite': 'sqlite+aiosqlite', 'postgresql': 'postgresql+asyncpg'}
+# Paths whose conditional GETs are answered here, with the Flask endpoint name for /metrics
+REVALIDATED = {'/check_session': 'checksession', '/games': 'newgame'}
+
+
+def _async_engine(uri):
+    """An async engine for `uri` with the app's pool settings, or None for an unsupported backend."""
+    if not uri:
+        return None
+    url = make_url(uri)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        return None
+    # connect_args are specific to the sync driver
+    options = {k: v for k, v in flask_app.config['SQLALCHEMY_ENGINE_OPTIONS'].items() if k != 'connect_args'}
+    return create_async_engine(url.set(drivername=driver), **options)
+
+
+primary = _async_engine(flask_app.config['SQLALCHEMY_DATABASE_URI'])
+replica_bind = flask_app.config['SQLALCHEMY_BINDS'].get(REPLICA_BIND)
+replica = _async_engine(replica_bind['url'] if replica_bind else None)
+
+
+def _read_session(cookie_header):
+    """The Flask session stored in the request's cookie, or {} if there is none or it is invalid."""
+    if not cookie_header:
+        return {}
+    value = parse_cookie(cookie_header.decode('latin1')).get(flask_app.config['SESSION_COOKIE_NAME'])
+    serializer = flask_app.session_interface.get_signing_serializer(flask_app)
+    if not value or serializer is None:
+        return {}
+    try:
+        return serializer.loads(value, max_age=int(flask_app.permanent_session_lifetime.total_seconds()))
+    except BadSignature:
+        return {}
+
+
+async def revalidate(scope):
+    """
+    Headers for a 304 when a conditional GET's ETag still matches, computed
+    with one async query, or None when the Flask app has to handle the
+    request. Cross-origin requests always go to Flask, which adds the CORS
+    headers.
+    """
+    headers = dict(scope['headers'])
+    if (primary is None or scope['method'] != 'GET' or b'origin' in headers
+            or b'if-none-match' not in headers):
+        return None
+    session = _read_session(headers.get(b'cookie'))
+    user_id = session.get('user_id')
+    if not user_id:
+        return None
+    # Same routing as @read_replica: the replica unless this client just wrote
+    engine = replica if replica is not None and session.get('primary_until', 0) <= time() else primary
+    async with engine.connect() as conn:
+        row = (await conn.execute(etag_query(user_id))).first()
+    if row is None:
+        return None
+    etag = format_etag(user_id, row, scope['query_string'])
+    if not parse_etags(headers[b'if-none-match'].decode('latin1')).contains_weak(etag):
+        return None
+    return {**etag_headers(etag), 'Vary': 'Cookie'}
+
+
+def _environ(scope, body):
+    """The WSGI environ for an ASGI HTTP request."""
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf8').decode('latin1'),
+        'PATH_INFO': scope['path'].encode('utf8').decode('latin1'),
+        'QUERY_STRING': scope['query_string'].decode('ascii'),
+        'SERVER_PROTOCOL': f"HTTP/{scope['http_version']}",
+        'SERVER_NAME': (scope.get('server') or ('localhost', 80))[0],
+        'SERVER_PORT': str((scope.get('server') or ('localhost', 80))[1]),
+        'REMOTE_ADDR': (scope.get('client') or ('', 0))[0],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope['headers']:
+        name = name.decode('latin1').upper().replace('-', '_')
+        key = name if name in ('CONTENT_TYPE', 'CONTENT_LENGTH') else f'HTTP_{name}'
+        value = value.decode('latin1')
+        environ[key] = f'{environ[key]},{value}' if key in environ else value
+    return environ
+
+
+class WSGIBridge:
+    """
+    Runs a WSGI app for ASGI HTTP requests on a thread pool and streams its
+    response back chunk by chunk, so /export still streams. Each chunk waits
+    until the event loop has sent it, which keeps memory bounded.
+    """
+
+    def __init__(self, wsgi_app, threads):
+        self.wsgi_app = wsgi_app
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='wsgi')
+
+    async def __call__(self, scope, receive, send):
+        # Uploads larger than 1 MiB spill to disk instead of memory
+        body = SpooledTemporaryFile(max_size=1024 * 1024)
+        more = True
+        while more:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+            body.write(message.get('body', b''))
+            more = message.get('more_body', False)
+        body.seek(0)
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(self.executor, self.run, _environ(scope, body), send, loop)
+        finally:
+            body.close()
+
+    def run(self, environ, send, loop):
+        pending_start = []
+
+        def emit(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        def write(data):
+            if pending_start:
+                emit(pending_start.pop())
+            if data:
+                emit({'type': 'http.response.body', 'body': data, 'more_body': True})
+
+        def start_response(status, headers, exc_info=None):
+            pending_start[:] = [{
+                'type': 'http.response.start',
+                'status': int(status.split(' ', 1)[0]),
+                'headers': [(k.lower().encode('latin1'), v.encode('latin1')) for k, v in headers],
+            }]
+            return write
+
+        result = self.wsgi_app(environ, start_response)
+        try:
+            for chunk in result:
+                write(chunk)
+            write(b'')
+            emit({'type': 'http.response.body', 'body': b''})
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+
+
+flask_bridge = WSGIBridge(flask_app, flask_app.config['ASGI_THREADS'])
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                for engine in (primary, replica):
+                    if engine is not None:
+                        await engine.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+    if scope['type'] != 'http':
+        return
+
+    endpoint = REVALIDATED.get(scope['path'])
+    if endpoint:
+        start = perf_counter()
+        headers = await revalidate(scope)
+        if headers is not None:
+            await send({
+                'type': 'http.response.start',
+                'status': 304,
+                'headers': [(k.lower().encode('latin1'), v.encode('latin1')) for k, v in headers.items()],
+            })
+            await send({'type': 'http.response.body', 'body': b''})
+            request_duration.observe((endpoint, 'GET'), perf_counter() - start)
+            return
+    await flask_bridge(scope, receive, send)
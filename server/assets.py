@@ -0,0 +1,179 @@
+"""
+The client build (client/build) served from a manifest made by one scan of
+the directory at startup, so a request only stats the file it opens. Hashed
+files (main.1a2b3c4d.js) are cached by browsers for a year as immutable;
+everything else, index.html included, is revalidated with its ETag. A
+file's precompressed foo.js.br / foo.js.gz sibling is sent instead when the
+client accepts it; `flask compress-assets` writes them after a build.
+An entry whose file changed since the scan (the client was rebuilt while
+the server runs) is rescanned before it is sent. New files are picked up
+on restart.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+from dataclasses import dataclass, field
+import click
+from flask import abort, request
+from werkzeug.utils import wrap_file
+from werkzeug.wrappers import Response
+from config import app
+from compression import brotli, is_compressible
+
+# Build tools put a content hash of at least 8 hex digits in the file name
+HASHED_NAME = re.compile(r'\.[0-9a-f]{8,}\.')
+IMMUTABLE = 'public, max-age=31536000, immutable'
+# Suffix of each precompressed variant, by content coding
+VARIANTS = {'br': '.br', 'gzip': '.gz'}
+
+
+@dataclass
+class Asset:
+    url_path: str
+    path: str
+    mimetype: str
+    size: int
+    mtime: float
+    etag: str
+    hashed: bool
+    # Content coding -> (path, size, mtime) of a precompressed copy
+    variants: dict = field(default_factory=dict)
+
+
+def _asset(path, url_path):
+    """The Asset for one file, with the precompressed copies next to it."""
+    stat = os.stat(path)
+    mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    etag = hashlib.blake2b(f'{url_path}:{stat.st_size}:{stat.st_mtime_ns}'.encode(), digest_size=8).hexdigest()
+    asset = Asset(url_path, path, mimetype, stat.st_size, stat.st_mtime, etag, bool(HASHED_NAME.search(url_path)))
+    for encoding, suffix in VARIANTS.items():
+        try:
+            variant = os.stat(path + suffix)
+        except FileNotFoundError:
+            continue
+        # A copy older than its original is left over from a previous build
+        if variant.st_mtime >= stat.st_mtime:
+            asset.variants[encoding] = (path + suffix, variant.st_size, variant.st_mtime)
+    return asset
+
+
+def scan(root):
+    """URL path -> Asset for every file under `root`, with precompressed copies attached to their originals."""
+    files = {}
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            files[os.path.relpath(path, root).replace(os.sep, '/')] = path
+    manifest = {}
+    for url_path, path in files.items():
+        if any(url_path.endswith(suffix) and url_path[:-len(suffix)] in files for suffix in VARIANTS.values()):
+            continue
+        manifest[url_path] = _asset(path, url_path)
+    return manifest
+
+
+manifest = scan(app.static_folder) if os.path.isdir(app.static_folder) else {}
+
+
+def lookup(path):
+    """The Asset for a URL path, or None. In debug mode a miss rescans the build directory."""
+    global manifest
+    asset = manifest.get(path)
+    if asset is None and app.debug and os.path.isdir(app.static_folder):
+        manifest = scan(app.static_folder)
+        asset = manifest.get(path)
+    return asset
+
+
+def refresh(url_path):
+    """Rescan the manifest entry of a file that changed on disk. Returns the new Asset, or None if it is gone."""
+    path = os.path.join(app.static_folder, *url_path.split('/'))
+    if not os.path.isfile(path):
+        manifest.pop(url_path, None)
+        return None
+    asset = manifest[url_path] = _asset(path, url_path)
+    return asset
+
+
+def _open(asset):
+    """Open the best copy of `asset` the client accepts. Returns (file, content coding or None, its stat)."""
+    # Variants in order of preference (VARIANTS), the first one the client accepts
+    encoding = next((e for e in VARIANTS if e in asset.variants and request.accept_encodings[e]), None)
+    f = open(asset.variants[encoding][0] if encoding else asset.path, 'rb')
+    return f, encoding, os.fstat(f.fileno())
+
+
+def _changed(asset, encoding, stat):
+    """Whether the opened copy, or the original behind it, differs from the manifest entry."""
+    size, mtime = (asset.variants[encoding][1:] if encoding else (asset.size, asset.mtime))
+    if (stat.st_size, stat.st_mtime) != (size, mtime):
+        return True
+    if encoding is None:
+        return False
+    # A rebuilt original makes its precompressed copies stale
+    original = os.stat(asset.path)
+    return (original.st_size, original.st_mtime) != (asset.size, asset.mtime)
+
+
+def send(asset):
+    """A response for `asset`: its best precompressed copy the client accepts, conditional and with caching headers."""
+    f = None
+    try:
+        f, encoding, stat = _open(asset)
+        stale = _changed(asset, encoding, stat)
+    except FileNotFoundError:
+        stale = True
+    if stale:
+        if f is not None:
+            f.close()
+        asset = refresh(asset.url_path)
+        if asset is None:
+            abort(404)
+        f, encoding, stat = _open(asset)
+    # The open file's own size, so the length always matches the bytes sent
+    size, etag = stat.st_size, asset.etag
+    if encoding:
+        etag = f'{etag}-{encoding}'
+    response = Response(wrap_file(request.environ, f), mimetype=asset.mimetype, direct_passthrough=True)
+    response.content_length = size
+    response.last_modified = asset.mtime
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = IMMUTABLE if asset.hashed else 'no-cache'
+    if asset.variants:
+        response.vary.add('Accept-Encoding')
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    return response.make_conditional(request.environ, accept_ranges=True, complete_length=size)
+
+
+@app.endpoint('static')
+def static(filename):
+    # Replaces Flask's static view, which stats the file on every request.
+    # With static_url_path = '' its rule matches every path; misses go to
+    # the 404 handler in config.py, which serves index.html to browsers.
+    asset = lookup(filename)
+    if asset is None:
+        abort(404)
+    return send(asset)
+
+
+@app.cli.command('compress-assets')
+@click.option('--min-size', default=1024, help='Skip files smaller than this many bytes.')
+def compress_assets(min_size):
+    """Write .gz (and .br, with brotli installed) copies of the client build's text assets."""
+    written = 0
+    for url_path, asset in scan(app.static_folder).items():
+        if asset.size < min_size or not is_compressible(asset.mimetype):
+            continue
+        with open(asset.path, 'rb') as f:
+            data = f.read()
+        copies = {'.gz': lambda: gzip.compress(data, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            copies['.br'] = lambda: brotli.compress(data, quality=11)
+        for suffix, make in copies.items():
+            with open(asset.path + suffix, 'wb') as f:
+                f.write(make())
+            written += 1
+    click.echo(f'Wrote {written} compressed files')
@@ -0,0 +1,224 @@
+"""
+HTTP load test for the REST API. Serves app.py on a local port, seeds the
+database at each requested scale and drives the main endpoints with
+concurrent clients, reporting latency percentiles, throughput and SQL
+statements per request (read from the Server-Timing header).
+
+    python -m benchmarks.api --scales small,medium --concurrency 8
+    python -m benchmarks.api --scales small --save      # refresh baselines
+    python -m benchmarks.api --scales small --compare   # diff against them
+
+Baselines live in benchmarks/baselines/api-<scale>.json; commit them so
+regressions show up as diffs.
+"""
+import os
+import tempfile
+
+# A threaded server needs a file-backed SQLite database rather than :memory:
+os.environ.setdefault(
+    'BENCH_DATABASE_URI', 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db'))
+
+import argparse
+import http.client
+import json
+import logging
+import re
+import statistics
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import count
+from time import perf_counter
+from werkzeug.serving import make_server
+from benchmarks.common import reset_database, seed_dataset
+from app import app
+from config import db
+from sqlalchemy import select
+from models import User, Game, Character
+
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), 'baselines')
+SCALES = {
+    'small': dict(users=20, games_per_user=5, players_per_game=4, sessions_per_game=5),
+    'medium': dict(users=200, games_per_user=25, players_per_game=4, sessions_per_game=10),
+    'large': dict(users=2000, games_per_user=50, players_per_game=5, sessions_per_game=20),
+}
+QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+class Client:
+    """One logged-in user talking to the server over HTTP with its own cookie jar."""
+
+    def __init__(self, port, username):
+        self.port = port
+        self.username = username
+        self.cookie = None
+
+    def request(self, method, path, body=None):
+        conn = http.client.HTTPConnection('127.0.0.1', self.port)
+        headers = {'Content-Type': 'application/json'}
+        if self.cookie:
+            headers['Cookie'] = self.cookie
+        start = perf_counter()
+        conn.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+        response = conn.getresponse()
+        payload = response.read()
+        elapsed = perf_counter() - start
+        set_cookie = response.getheader('Set-Cookie')
+        if set_cookie:
+            self.cookie = set_cookie.split(';', 1)[0]
+        match = QUERIES.search(response.getheader('Server-Timing') or '')
+        conn.close()
+        data = json.loads(payload) if payload else None
+        return response.status, data, elapsed, int(match.group(1)) if match else 0
+
+    def login(self):
+        return self.request('POST', '/login', {'username': self.username, 'password': 'password123'})
+
+
+def scenarios(fixtures):
+    """
+    Each scenario is (name, expected status, fn(client, n) -> response tuple).
+    `fixtures` maps a username to a game id and character id it owns.
+    """
+    sessions_made = {}
+    ids = count()
+
+    def create_session(client, n):
+        game_id = fixtures[client.username]['game_id']
+        result = client.request('POST', f'/games/{game_id}/sessions',
+                                {'date': '2024-05-01', 'summary': f'Load test session {n}'})
+        if result[0] == 201:
+            sessions_made.setdefault(client.username, []).append(result[1]['id'])
+        return result
+
+    def session_id(client):
+        made = sessions_made.get(client.username) or [None]
+        return made[next(ids) % len(made)]
+
+    def create_game(client, n):
+        assignments = [
+            {'player': {'name': f'Player {n}-{i}'},
+             'character': {'name': f'Hero {n}-{i}', 'character_class': 'Bard', 'level': 1}}
+            for i in range(4)
+        ]
+        return client.request('POST', '/games', {
+            'title': f'Load test campaign {n}', 'system': 'D&D 5e', 'status': 'planned',
+            'assignments': assignments,
+        })
+
+    def delete_session(client, n):
+        made = sessions_made.get(client.username)
+        return client.request('DELETE', f'/sessions/{made.pop() if made else 0}')
+
+    return [
+        ('login', 200, lambda c, n: c.login()),
+        ('check_session', 200, lambda c, n: c.request('GET', '/check_session')),
+        ('get_games', 200, lambda c, n: c.request('GET', '/games')),
+        ('create_game_nested', 201, create_game),
+        ('create_session', 201, create_session),
+        ('update_session', 200, lambda c, n: c.request(
+            'PATCH', f'/sessions/{session_id(c)}', {'summary': f'Edited {n}'})),
+        ('update_character', 200, lambda c, n: c.request(
+            'PATCH', f"/characters/{fixtures[c.username]['character_id']}", {'level': n % 20 + 1})),
+        ('delete_session', 204, delete_session),
+    ]
+
+
+def run_scenario(clients, fn, expected, requests, concurrency):
+    def call(n):
+        client = clients[n % len(clients)]
+        status, _, elapsed, queries = fn(client, n)
+        return status == expected, elapsed, queries
+
+    start = perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(call, range(requests)))
+    wall = perf_counter() - start
+    latencies = sorted(elapsed for _, elapsed, _ in results)
+    cuts = statistics.quantiles(latencies, n=100, method='inclusive')
+    return {
+        'requests': requests,
+        'errors': sum(1 for ok, _, _ in results if not ok),
+        'throughput_rps': round(requests / wall, 1),
+        'p50_ms': round(cuts[49] * 1000, 2),
+        'p95_ms': round(cuts[94] * 1000, 2),
+        'p99_ms': round(cuts[98] * 1000, 2),
+        'queries_per_request': round(statistics.mean(q for _, _, q in results), 2),
+    }
+
+
+def bench_scale(scale, port, requests, concurrency):
+    reset_database()
+    counts = seed_dataset(**SCALES[scale])
+    print(f"\n[{scale}] seeded", ', '.join(f'{n} {table}' for table, n in counts.items()))
+
+    with app.app_context():
+        users = db.session.execute(
+            select(User.id, User.username).order_by(User.id).limit(concurrency)).all()
+        fixtures = {}
+        for user_id, username in users:
+            game_id = db.session.scalar(select(Game.id).where(Game.user_id == user_id).limit(1))
+            character_id = db.session.scalar(select(Character.id).where(Character.game_id == game_id).limit(1))
+            fixtures[username] = {'game_id': game_id, 'character_id': character_id}
+
+    clients = [Client(port, username) for username in fixtures]
+    for client in clients:
+        client.login()
+
+    results = {}
+    for name, expected, fn in scenarios(fixtures):
+        results[name] = run_scenario(clients, fn, expected, requests, concurrency)
+        r = results[name]
+        print(f"  {name:20} p50 {r['p50_ms']:8.2f}  p95 {r['p95_ms']:8.2f}  p99 {r['p99_ms']:8.2f} ms"
+              f"  {r['throughput_rps']:8.1f} req/s  {r['queries_per_request']:5.1f} q/req"
+              + (f"  {r['errors']} errors" if r['errors'] else ''))
+    return {'scale': scale, 'dataset': SCALES[scale], 'concurrency': concurrency, 'results': results}
+
+
+def compare(report):
+    path = os.path.join(BASELINE_DIR, f"api-{report['scale']}.json")
+    if not os.path.exists(path):
+        print(f"  no baseline at {path}")
+        return
+    with open(path) as f:
+        baseline = json.load(f)['results']
+    print(f"  vs baseline {path}:")
+    for name, r in report['results'].items():
+        old = baseline.get(name)
+        if not old:
+            continue
+        change = (r['p95_ms'] - old['p95_ms']) / old['p95_ms'] * 100 if old['p95_ms'] else 0
+        print(f"    {name:20} p95 {old['p95_ms']:8.2f} -> {r['p95_ms']:8.2f} ms ({change:+.0f}%)"
+              f"  q/req {old['queries_per_request']} -> {r['queries_per_request']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scales', default='small', help=f"comma-separated, from {', '.join(SCALES)}")
+    parser.add_argument('--requests', type=int, default=200, help='requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--save', action='store_true', help='write results as the new baselines')
+    parser.add_argument('--compare', action='store_true', help='compare results with the saved baselines')
+    args = parser.parse_args()
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    # Room for every client's login in the bcrypt queue, so the login scenario
+    # measures hashing rather than 503s from a full queue on small machines
+    app.config['BCRYPT_MAX_PENDING'] = max(app.config['BCRYPT_MAX_PENDING'], args.concurrency)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        for scale in args.scales.split(','):
+            report = bench_scale(scale.strip(), server.server_port, args.requests, args.concurrency)
+            if args.compare:
+                compare(report)
+            if args.save:
+                os.makedirs(BASELINE_DIR, exist_ok=True)
+                with open(os.path.join(BASELINE_DIR, f'api-{scale.strip()}.json'), 'w') as f:
+                    json.dump(report, f, indent=2, sort_keys=True)
+                    f.write('\n')
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+"""
+Sync (gunicorn, gthread) against async (uvicorn, asgi.py) serving. Seeds a
+file-backed SQLite database, starts each server as a subprocess with the
+same number of processes and threads, and has many concurrent clients poll
+/check_session and GET /games the way the client does: mostly conditional
+requests with If-None-Match, plus some full page loads. Reports throughput
+and latency percentiles for each build.
+
+    python -m benchmarks.asgi --requests 4000 --concurrency 64 --workers 1 --threads 8
+"""
+import os
+import tempfile
+
+os.environ.setdefault(
+    'BENCH_DATABASE_URI', 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db'))
+# Logins are setup here, not what is measured
+os.environ.setdefault('BCRYPT_LOG_ROUNDS', '4')
+
+import argparse
+import http.client
+import socket
+import statistics
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter, sleep
+from benchmarks.api import Client
+from benchmarks.common import reset_database, seed_dataset
+from app import app
+from config import db
+from sqlalchemy import select
+from models import User
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def server_command(build, port, workers):
+    if build == 'sync':
+        return [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--bind', f'127.0.0.1:{port}',
+                '--workers', str(workers), '--access-logfile', '/dev/null', '--log-level', 'warning', 'app:app']
+    return [sys.executable, '-m', 'uvicorn', 'asgi:application', '--port', str(port),
+            '--workers', str(workers), '--log-level', 'warning', '--no-access-log']
+
+
+def start_server(build, workers, threads):
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    env = dict(os.environ, DATABASE_URI=os.environ['BENCH_DATABASE_URI'], GUNICORN_THREADS=str(threads),
+               ASGI_THREADS=str(threads), BCRYPT_WORKERS='0')
+    process = subprocess.Popen(server_command(build, port, workers), cwd=SERVER_DIR, env=env,
+                               stdout=subprocess.DEVNULL)
+    for _ in range(100):
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.1).close()
+            return process, port
+        except OSError:
+            sleep(0.1)
+    process.kill()
+    raise RuntimeError(f'{build} server did not start')
+
+
+def get(port, cookie, path, etag=None):
+    """GET `path` as a logged-in client, optionally conditional. Returns (status, ETag, seconds)."""
+    conn = http.client.HTTPConnection('127.0.0.1', port)
+    headers = {'Cookie': cookie}
+    if etag:
+        headers['If-None-Match'] = etag
+    start = perf_counter()
+    conn.request('GET', path, headers=headers)
+    response = conn.getresponse()
+    response.read()
+    elapsed = perf_counter() - start
+    conn.close()
+    return response.status, response.getheader('ETag'), elapsed
+
+
+def bench_build(build, usernames, args):
+    process, port = start_server(build, args.workers, args.threads)
+    try:
+        clients = [Client(port, usernames[i % len(usernames)]) for i in range(args.concurrency)]
+        for client in clients:
+            client.login()
+        paths = ('/check_session', '/games')
+        etags = {(client.username, path): get(port, client.cookie, path)[1] for client in clients for path in paths}
+
+        def call(n):
+            client, path = clients[n % len(clients)], paths[n % 2]
+            # Every full_every-th request is a page load, the rest are polls that come back 304
+            etag = None if n % args.full_every == 0 else etags[client.username, path]
+            status, _, elapsed = get(port, client.cookie, path, etag)
+            return status == (200 if etag is None else 304), elapsed
+
+        start = perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            results = list(pool.map(call, range(args.requests)))
+        wall = perf_counter() - start
+    finally:
+        process.terminate()
+        process.wait()
+
+    cuts = statistics.quantiles(sorted(elapsed for _, elapsed in results), n=100, method='inclusive')
+    return {
+        'throughput_rps': round(args.requests / wall, 1),
+        'errors': sum(1 for ok, _ in results if not ok),
+        'p50_ms': round(cuts[49] * 1000, 2),
+        'p95_ms': round(cuts[94] * 1000, 2),
+        'p99_ms': round(cuts[98] * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=4000)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--workers', type=int, default=1, help='server processes')
+    parser.add_argument('--threads', type=int, default=8, help='request threads per process')
+    parser.add_argument('--users', type=int, default=16)
+    parser.add_argument('--full-every', type=int, default=10, help='one full GET /games per this many requests')
+    parser.add_argument('--builds', default='sync,asgi')
+    args = parser.parse_args()
+
+    reset_database()
+    seed_dataset(users=args.users, games_per_user=10, players_per_game=4, sessions_per_game=10)
+    with app.app_context():
+        usernames = db.session.scalars(select(User.username).order_by(User.id)).all()
+
+    print(f"{args.requests} requests from {args.concurrency} concurrent clients, "
+          f"{args.workers} process(es) x {args.threads} threads, 1 in {args.full_every} a full load")
+    for build in args.builds.split(','):
+        r = bench_build(build.strip(), usernames, args)
+        print(f"  {build:5} {r['throughput_rps']:8.1f} req/s  p50 {r['p50_ms']:8.2f}  p95 {r['p95_ms']:8.2f}"
+              f"  p99 {r['p99_ms']:8.2f} ms" + (f"  {r['errors']} errors" if r['errors'] else ''))
+
+
+if __name__ == '__main__':
+    main()
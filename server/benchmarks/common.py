@@ -0,0 +1,43 @@
+"""
+Shared setup for the benchmark scripts. Run them from the server directory,
+e.g. `python -m benchmarks.game_players`.
+"""
+import os
+import statistics
+from time import perf_counter
+
+# Benchmarks drop and recreate tables, so they never touch the configured
+# DATABASE_URI. Point BENCH_DATABASE_URI at a scratch database to use Postgres.
+os.environ['DATABASE_URI'] = os.getenv('BENCH_DATABASE_URI', 'sqlite://')
+
+from app import app
+from config import db
+from seed import seed_at_scale
+
+
+def reset_database():
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+
+
+def seed_dataset(users=1, games_per_user=100, players_per_game=4,
+                 chars_per_player=1, sessions_per_game=10, seed=0):
+    """
+    Bulk-load a deterministic dataset (see seed.seed_at_scale) and return the
+    row counts. Every user's password is "password123".
+    """
+    with app.app_context():
+        return seed_at_scale(users, games_per_user, players_per_game=players_per_game,
+                             characters_per_player=chars_per_player,
+                             sessions_per_game=sessions_per_game, seed=seed)
+
+
+def measure(fn, repeat=5):
+    """Run fn `repeat` times and return (median, min) wall time in seconds."""
+    timings = []
+    for _ in range(repeat):
+        start = perf_counter()
+        fn()
+        timings.append(perf_counter() - start)
+    return statistics.median(timings), min(timings)
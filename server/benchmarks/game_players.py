@@ -0,0 +1,69 @@
+"""
+Compare GameSchema's batched player grouping with the previous per-game path,
+which built a new CharacterSchema and grouped characters for every game.
+
+    python -m benchmarks.game_players --games 500 --players 4
+"""
+import argparse
+from collections import defaultdict
+from benchmarks.common import reset_database, seed_dataset, measure
+from app import app
+from config import db
+from sqlalchemy import select
+from models import Game
+from schemas import GameSchema, CharacterSchema
+
+
+class LegacyGameSchema(GameSchema):
+    # Redefining the hook without @pre_dump disables the batched grouping
+    def group_players(self, data, many, **kwargs):
+        return data
+
+    def get_game_players(self, obj):
+        grouped = defaultdict(list)
+        for char in getattr(obj, 'characters', []) or []:
+            if char.player:
+                grouped[char.player].append(char)
+        return [
+            {
+                'id': player.id,
+                'name': player.name,
+                'summary': player.summary,
+                'characters': CharacterSchema(many=True).dump(chars)
+            }
+            for player, chars in grouped.items()
+        ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--games', type=int, default=300)
+    parser.add_argument('--players', type=int, default=4)
+    parser.add_argument('--chars', type=int, default=2, help='characters per player')
+    parser.add_argument('--sessions', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    reset_database()
+    counts = seed_dataset(games_per_user=args.games, players_per_game=args.players,
+                          chars_per_player=args.chars, sessions_per_game=args.sessions)
+    print('Seeded', ', '.join(f'{n} {table}' for table, n in counts.items()))
+
+    with app.app_context():
+        schema, options = GameSchema.from_request({}, many=True)
+        games = db.session.execute(select(Game).options(*options)).scalars().all()
+        legacy = LegacyGameSchema(many=True)
+        assert legacy.dump(games) == schema.dump(games), 'payloads differ'
+
+        results = {
+            'legacy (per-game schemas)': measure(lambda: legacy.dump(games), args.repeat),
+            'batched': measure(lambda: schema.dump(games), args.repeat),
+        }
+    for name, (median, best) in results.items():
+        print(f'{name:28} median {median * 1000:8.1f} ms   min {best * 1000:8.1f} ms')
+    legacy_median = results['legacy (per-game schemas)'][0]
+    print(f'speedup: {legacy_median / results["batched"][0]:.2f}x')
+
+
+if __name__ == '__main__':
+    main()
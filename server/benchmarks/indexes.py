@@ -0,0 +1,84 @@
+"""
+Seed a large dataset and show query plans and timings for the hot lookups
+with and without the FK/lookup indexes declared on the models.
+
+    python -m benchmarks.indexes --users 200 --games-per-user 25
+    BENCH_DATABASE_URI=postgresql://localhost/dmn_bench python -m benchmarks.indexes
+"""
+import argparse
+from benchmarks.common import reset_database, seed_dataset, measure
+from app import app
+from config import db
+from sqlalchemy import select, text
+from models import Game, Player, Session, Character
+
+
+def hot_queries(user_id, game_ids, player_ids):
+    """The statements behind GET /games, /check_session and the roster, by name."""
+    return {
+        'games page for user': select(Game).where(Game.user_id == user_id, Game.id > 0)
+                                           .order_by(Game.id).limit(50),
+        'sessions of games (selectin)': select(Session).where(Session.game_id.in_(game_ids)),
+        'sessions of a game by date': select(Session).where(Session.game_id == game_ids[0])
+                                                     .order_by(Session.date),
+        'characters of games (selectin)': select(Character).where(Character.game_id.in_(game_ids)),
+        'characters of players (selectin)': select(Character).where(Character.player_id.in_(player_ids)),
+        'player roster': Player.roster_for(user_id),
+    }
+
+
+def explain(stmt):
+    dialect = db.engine.dialect
+    sql = str(stmt.compile(dialect=dialect, compile_kwargs={'literal_binds': True}))
+    prefix = 'EXPLAIN QUERY PLAN ' if dialect.name == 'sqlite' else 'EXPLAIN '
+    rows = db.session.execute(text(prefix + sql)).all()
+    # SQLite returns (id, parent, notused, detail); Postgres returns one text column
+    return [row[-1] for row in rows]
+
+
+def run(queries, repeat):
+    for name, stmt in queries.items():
+        median, _ = measure(lambda: db.session.execute(stmt).all(), repeat)
+        print(f'  {name:34} {median * 1000:8.2f} ms')
+        for line in explain(stmt):
+            print(f'      {line}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--games-per-user', type=int, default=25)
+    parser.add_argument('--sessions', type=int, default=20, help='sessions per game')
+    parser.add_argument('--players', type=int, default=4, help='players per game')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    reset_database()
+    counts = seed_dataset(users=args.users, games_per_user=args.games_per_user,
+                          players_per_game=args.players, sessions_per_game=args.sessions)
+    print('Seeded', ', '.join(f'{n} {table}' for table, n in counts.items()))
+
+    indexes = [index for model in (Game, Session, Character) for index in model.__table__.indexes]
+    with app.app_context():
+        # Look at a user in the middle of the table
+        user_id = args.users // 2 + 1
+        game_ids = db.session.scalars(select(Game.id).where(Game.user_id == user_id)).all()
+        player_ids = db.session.scalars(
+            select(Character.player_id).where(Character.game_id.in_(game_ids))).all()
+        queries = hot_queries(user_id, game_ids, player_ids)
+
+        for index in indexes:
+            index.drop(db.engine)
+        db.session.execute(text('ANALYZE'))
+        print('\nWithout indexes:')
+        run(queries, args.repeat)
+
+        for index in indexes:
+            index.create(db.engine)
+        db.session.execute(text('ANALYZE'))
+        print('\nWith indexes:')
+        run(queries, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+games_schema.dump followed by JSON encoding for one large account, with the
+encoders the API has used: the standard library pretty-printed (the old
+app.json.compact = False) and with default separators (Flask-RESTful's old
+output_json), then json_provider.dumps compact with the standard library and
+with orjson. Reports the time to dump and encode, and the payload size.
+
+    python -m benchmarks.json_encoding --games 500 --sessions 20
+"""
+import argparse
+import json
+from benchmarks.common import reset_database, seed_dataset, measure
+from app import app
+from config import db
+from sqlalchemy import select
+from models import Game
+from schemas import GameSchema
+import json_provider
+
+
+def stdlib_compact(data):
+    # json_provider.dumps as it runs without orjson installed
+    orjson, json_provider.orjson = json_provider.orjson, None
+    try:
+        return json_provider.dumps(data)
+    finally:
+        json_provider.orjson = orjson
+
+
+ENCODERS = {
+    'stdlib, indent=2': lambda data: json.dumps(data, indent=2).encode('utf-8'),
+    'stdlib, default separators': lambda data: json.dumps(data).encode('utf-8'),
+    'stdlib, compact': stdlib_compact,
+    'orjson, compact': json_provider.dumps,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--games', type=int, default=500)
+    parser.add_argument('--players', type=int, default=4)
+    parser.add_argument('--sessions', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    reset_database()
+    counts = seed_dataset(games_per_user=args.games, players_per_game=args.players,
+                          sessions_per_game=args.sessions)
+    print('Seeded', ', '.join(f'{n} {table}' for table, n in counts.items()))
+
+    encoders = dict(ENCODERS)
+    if json_provider.orjson is None:
+        print('orjson is not installed; skipping it')
+        del encoders['orjson, compact']
+
+    with app.app_context():
+        schema, options = GameSchema.from_request({}, many=True)
+        games = db.session.execute(select(Game).options(*options)).scalars().all()
+        payload = {'games': schema.dump(games), 'next_cursor': None}
+        dump_median, _ = measure(lambda: schema.dump(games), args.repeat)
+        assert len({json.dumps(json.loads(fn(payload))) for fn in encoders.values()}) == 1, 'payloads differ'
+
+        print(f"{'games_schema.dump':28} median {dump_median * 1000:8.1f} ms")
+        baseline = None
+        for name, fn in encoders.items():
+            median, best = measure(lambda: fn(payload), args.repeat)
+            size = len(fn(payload))
+            baseline = baseline or median
+            print(f'{name:28} median {median * 1000:8.1f} ms   min {best * 1000:8.1f} ms   '
+                  f'{size / 1024:8.1f} KiB   dump+encode {(dump_median + median) * 1000:8.1f} ms   '
+                  f'encode speedup {baseline / median:5.2f}x')
+
+
+if __name__ == '__main__':
+    main()
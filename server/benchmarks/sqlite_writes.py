@@ -0,0 +1,137 @@
+"""
+Concurrent-write benchmark for SQLite. Serves app.py on a local port over a
+file-backed SQLite database and has many clients PATCH characters, POST
+sessions and GET /games at the same time, once with SQLite's stock settings
+(rollback journal, no writer lock) and once with the settings from
+sqlite_mode.py (WAL, synchronous=NORMAL, serialized writers). Reports
+throughput, latency percentiles and failed requests for each mode.
+
+    python -m benchmarks.sqlite_writes --requests 2000 --concurrency 32
+"""
+import os
+import tempfile
+
+# WAL and file locking only mean anything for a database on disk
+os.environ.setdefault(
+    'BENCH_DATABASE_URI', 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db'))
+
+import argparse
+import logging
+import statistics
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+from werkzeug.serving import make_server
+from benchmarks.api import Client
+from benchmarks.common import reset_database, seed_dataset
+from app import app
+from config import db
+from sqlalchemy import select
+from models import User, Game, Character
+
+# Settings before sqlite_mode.py: pysqlite's 5 s busy timeout and SQLite's defaults
+MODES = {
+    'stock': dict(SQLITE_JOURNAL_MODE='delete', SQLITE_SYNCHRONOUS='full', SQLITE_BUSY_TIMEOUT_MS=5000,
+                  SQLITE_MMAP_SIZE=0, SQLITE_CACHE_SIZE_KB=2000, SQLITE_SERIALIZE_WRITES=False),
+    'tuned': {key: app.config[key] for key in (
+        'SQLITE_JOURNAL_MODE', 'SQLITE_SYNCHRONOUS', 'SQLITE_BUSY_TIMEOUT_MS',
+        'SQLITE_MMAP_SIZE', 'SQLITE_CACHE_SIZE_KB', 'SQLITE_SERIALIZE_WRITES')},
+}
+
+
+def use_mode(settings):
+    """Apply a mode's settings and drop pooled connections so new ones pick them up."""
+    app.config.update(settings)
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+def workload(fixtures):
+    """(name, expected status, fn(client, n)) for each kind of request, mixed round-robin."""
+    def update_character(client, n):
+        return client.request('PATCH', f"/characters/{fixtures[client.username]['character_id']}",
+                              {'level': n % 20 + 1})
+
+    def create_session(client, n):
+        return client.request('POST', f"/games/{fixtures[client.username]['game_id']}/sessions",
+                              {'date': '2024-05-01', 'summary': f'Concurrent session {n}'})
+
+    return [
+        ('update_character', 200, update_character),
+        ('create_session', 201, create_session),
+        ('get_games', 200, lambda client, n: client.request('GET', '/games?limit=10')),
+    ]
+
+
+def run_mode(clients, fixtures, requests, concurrency):
+    kinds = workload(fixtures)
+
+    def call(n):
+        name, expected, fn = kinds[n % len(kinds)]
+        status, _, elapsed, _ = fn(clients[n % len(clients)], n)
+        return name, status, status == expected, elapsed
+
+    start = perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(call, range(requests)))
+    wall = perf_counter() - start
+
+    report = {}
+    for name, _, _ in kinds:
+        mine = [r for r in results if r[0] == name]
+        cuts = statistics.quantiles(sorted(r[3] for r in mine), n=100, method='inclusive')
+        report[name] = {
+            'requests': len(mine),
+            'errors': sum(1 for r in mine if not r[2]),
+            'statuses': dict(Counter(r[1] for r in mine if not r[2])),
+            'p50_ms': round(cuts[49] * 1000, 2),
+            'p95_ms': round(cuts[94] * 1000, 2),
+            'p99_ms': round(cuts[98] * 1000, 2),
+        }
+    report['total'] = {'throughput_rps': round(requests / wall, 1),
+                       'errors': sum(1 for r in results if not r[2])}
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=1500, help='requests per mode')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--users', type=int, default=16)
+    parser.add_argument('--modes', default='stock,tuned', help=f"comma-separated, from {', '.join(MODES)}")
+    args = parser.parse_args()
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        for mode in args.modes.split(','):
+            use_mode(MODES[mode.strip()])
+            reset_database()
+            seed_dataset(users=args.users, games_per_user=5, players_per_game=4, sessions_per_game=5)
+            with app.app_context():
+                fixtures = {}
+                for user_id, username in db.session.execute(select(User.id, User.username)).all():
+                    game_id = db.session.scalar(select(Game.id).where(Game.user_id == user_id).limit(1))
+                    character_id = db.session.scalar(
+                        select(Character.id).where(Character.game_id == game_id).limit(1))
+                    fixtures[username] = {'game_id': game_id, 'character_id': character_id}
+            clients = [Client(server.server_port, username) for username in fixtures]
+            for client in clients:
+                client.login()
+
+            report = run_mode(clients, fixtures, args.requests, args.concurrency)
+            print(f"\n[{mode}] {args.requests} requests, {args.concurrency} concurrent clients: "
+                  f"{report['total']['throughput_rps']} req/s, {report['total']['errors']} failed")
+            for name, _, _ in workload(fixtures):
+                r = report[name]
+                print(f"  {name:18} p50 {r['p50_ms']:8.2f}  p95 {r['p95_ms']:8.2f}  p99 {r['p99_ms']:8.2f} ms"
+                      + (f"  {r['errors']} failed {r['statuses']}" if r['errors'] else ''))
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+import time
+from datetime import timedelta
+import click
+from sqlalchemy import select, delete, func
+from config import app, db
+from models import ChangeLog, Game, Session, Character, Player, utcnow
+from pagination import encode_cursor, decode_cursor
+from schemas import GameSchema, SessionSchema, CharacterSchema, PlayerSchema
+
+# Most log entries read by one /sync call; clients repeat while has_more
+SYNC_LIMIT = 500
+
+
+class CursorExpired(ValueError):
+    """The cursor predates the retention window, so entries after it may be gone."""
+
+
+def sync_cursor(last_id):
+    """Cursor for a client that has seen every entry up to last_id."""
+    return encode_cursor([last_id, int(time.time())])
+
+
+def read_cursor(cursor):
+    """Return the last seen entry id, raising ValueError or CursorExpired."""
+    values = decode_cursor(cursor)
+    if len(values) != 2 or not all(isinstance(v, int) for v in values):
+        raise ValueError('Invalid cursor')
+    last_id, issued_at = values
+    if issued_at < time.time() - app.config['CHANGE_LOG_RETENTION_DAYS'] * 86400:
+        raise CursorExpired('Cursor expired; reload /check_session and sync from there')
+    return last_id
+
+
+def latest_entry_id(user_id):
+    return db.session.scalar(select(func.max(ChangeLog.id)).where(ChangeLog.user_id == user_id)) or 0
+
+
+def _snapshots(entity, ids):
+    """Current serialized form of the given rows of one kind, by id."""
+    if entity == 'game':
+        schema, options = GameSchema.from_request({}, many=True)
+        model = Game
+    else:
+        model, schema = {
+            'session': (Session, SessionSchema(many=True)),
+            'character': (Character, CharacterSchema(many=True)),
+            'player': (Player, PlayerSchema(exclude=('characters',), many=True)),
+        }[entity]
+        options = []
+    rows = db.session.scalars(select(model).where(model.id.in_(ids)).options(*options)).unique().all()
+    return {row.id: data for row, data in zip(rows, schema.dump(rows))}
+
+
+def changes_since(user_id, last_id):
+    """
+    The user's changes after entry last_id, at most SYNC_LIMIT log entries.
+    Returns (changes, new last_id, has_more). Each change is
+    {"entity", "id", "op": "upsert"|"delete"}, and upserts carry "data",
+    the row as it is now (games include their sessions and players).
+    """
+    rows = db.session.execute(
+        select(ChangeLog.id, ChangeLog.entity, ChangeLog.entity_id, ChangeLog.op)
+        .where(ChangeLog.user_id == user_id, ChangeLog.id > last_id)
+        .order_by(ChangeLog.id)
+        .limit(SYNC_LIMIT + 1)
+    ).all()
+    has_more = len(rows) > SYNC_LIMIT
+    rows = rows[:SYNC_LIMIT]
+    if rows:
+        last_id = rows[-1].id
+    # Only the latest entry for each row matters, in the order they happened
+    latest = {}
+    for row in rows:
+        latest.pop((row.entity, row.entity_id), None)
+        latest[(row.entity, row.entity_id)] = row.op
+    wanted = {}
+    for (entity, entity_id), op in latest.items():
+        if op == 'upsert':
+            wanted.setdefault(entity, []).append(entity_id)
+    snapshots = {entity: _snapshots(entity, ids) for entity, ids in wanted.items()}
+
+    changes = []
+    for (entity, entity_id), op in latest.items():
+        change = {'entity': entity, 'id': entity_id, 'op': op}
+        if op == 'upsert':
+            data = snapshots[entity].get(entity_id)
+            if data is None:
+                # Removed since, without an entry of its own (e.g. by a cascade)
+                change['op'] = 'delete'
+            else:
+                change['data'] = data
+        changes.append(change)
+    return changes, last_id, has_more
+
+
+def compact():
+    """
+    Remove entries superseded by a later one for the same user and row, and
+    entries older than CHANGE_LOG_RETENTION_DAYS. Returns how many went.
+    """
+    latest = (
+        select(func.max(ChangeLog.id))
+        .group_by(ChangeLog.user_id, ChangeLog.entity, ChangeLog.entity_id)
+    )
+    cutoff = utcnow() - timedelta(days=app.config['CHANGE_LOG_RETENTION_DAYS'])
+    removed = db.session.execute(delete(ChangeLog).where(ChangeLog.id.not_in(latest))).rowcount
+    removed += db.session.execute(delete(ChangeLog).where(ChangeLog.created_at < cutoff)).rowcount
+    db.session.commit()
+    return removed
+
+
+@app.cli.command('compact-changelog')
+def compact_command():
+    """Compact the change log behind GET /sync (for cron)."""
+    click.echo(f'Removed {compact()} change log entries')
@@ -0,0 +1,104 @@
+from sqlalchemy import select, func
+from config import db
+from models import Character, Game
+
+# ?sort= values and the key each one pages on (id last, so the order is stable)
+SORT_KEYS = {
+    'name': (Character.name, Character.id),
+    'level': (Character.level, Character.id),
+    'character_class': (Character.character_class, Character.id),
+    'id': (Character.id,),
+}
+DEFAULT_SORT = 'name'
+
+
+def _int(args, name):
+    value = args.get(name)
+    if value is None or value == '':
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f'{name} must be an integer')
+
+
+def _list(args, name, convert=str):
+    """Comma-separated values, so a facet can select several at once."""
+    values = [v.strip() for v in (args.get(name) or '').split(',') if v.strip()]
+    try:
+        return [convert(v) for v in values]
+    except ValueError:
+        raise ValueError(f'{name} must be a comma-separated list of integers')
+
+
+def parse_filters(args):
+    """
+    Read the GET /characters filters from the query string into
+    {name: where clause}. Keyed by name so each facet can be counted with
+    every filter except its own. Raises ValueError on bad input.
+    """
+    filters = {}
+    classes = _list(args, 'character_class')
+    if classes:
+        filters['character_class'] = Character.character_class.in_(classes)
+    game_ids = _list(args, 'game_id', int)
+    if game_ids:
+        filters['game_id'] = Character.game_id.in_(game_ids)
+    player_id = _int(args, 'player_id')
+    if player_id is not None:
+        filters['player_id'] = Character.player_id == player_id
+    level_min, level_max = _int(args, 'level_min'), _int(args, 'level_max')
+    if level_min is not None:
+        filters['level_min'] = Character.level >= level_min
+    if level_max is not None:
+        filters['level_max'] = Character.level <= level_max
+    is_active = args.get('is_active')
+    if is_active:
+        if is_active.lower() not in ('true', 'false', '1', '0'):
+            raise ValueError('is_active must be true or false')
+        filters['is_active'] = Character.is_active.is_(is_active.lower() in ('true', '1'))
+    return filters
+
+
+def parse_sort(value):
+    """?sort=<key> or ?sort=-<key> for descending. Returns (key_columns, descending)."""
+    value = value or DEFAULT_SORT
+    descending = value.startswith('-')
+    key = value[1:] if descending else value
+    if key not in SORT_KEYS:
+        raise ValueError(f"sort must be one of {', '.join(SORT_KEYS)} (prefix with - to reverse)")
+    return SORT_KEYS[key], descending
+
+
+def characters_for(user_id, filters):
+    """Select the characters in the user's games that match every filter."""
+    return select(Character).join(Character.game).where(Game.user_id == user_id, *filters.values())
+
+
+def facet_counts(user_id, filters):
+    """
+    Characters per class and per game, counted in SQL with every filter
+    applied except the facet's own, so the counts show what selecting
+    another class or game would return.
+    """
+    def others(name):
+        return [clause for key, clause in filters.items() if key != name]
+
+    by_class = db.session.execute(
+        select(Character.character_class, func.count())
+        .join(Character.game)
+        .where(Game.user_id == user_id, *others('character_class'))
+        .group_by(Character.character_class)
+        .order_by(Character.character_class)
+    ).all()
+    by_game = db.session.execute(
+        select(Game.id, Game.title, func.count(Character.id))
+        .join(Character.game)
+        .where(Game.user_id == user_id, *others('game_id'))
+        .group_by(Game.id, Game.title)
+        .order_by(Game.id)
+    ).all()
+    return {
+        'character_class': [{'character_class': name, 'count': count} for name, count in by_class],
+        'game': [{'game_id': id, 'title': title, 'count': count} for id, title, count in by_game],
+    }
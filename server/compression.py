@@ -0,0 +1,57 @@
+"""
+Compression of API responses. Bodies of at least COMPRESS_MIN_SIZE bytes
+with a text-like type are compressed with brotli (in requirements.txt)
+when the client accepts it, otherwise gzip. Streamed responses (/export
+gzips itself), file responses (see assets.py) and bodies that already have
+a Content-Encoding are left alone.
+"""
+import gzip
+from flask import request
+from config import app
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = ('application/json', 'application/javascript', 'application/x-ndjson',
+                      'application/manifest+json', 'image/svg+xml')
+
+
+def is_compressible(mimetype):
+    return bool(mimetype) and (mimetype.startswith('text/') or mimetype in COMPRESSIBLE_TYPES)
+
+
+def choose_encoding(accept_encodings):
+    """'br', 'gzip' or None, by the client's Accept-Encoding preferences."""
+    br, gz = accept_encodings['br'], accept_encodings['gzip']
+    if brotli is not None and br and br >= gz:
+        return 'br'
+    return 'gzip' if gz else None
+
+
+def compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=app.config['COMPRESS_BROTLI_QUALITY'])
+    return gzip.compress(data, compresslevel=app.config['COMPRESS_GZIP_LEVEL'], mtime=0)
+
+
+@app.after_request
+def compress_response(response):
+    if (not app.config['COMPRESS_RESPONSES'] or request.method == 'HEAD'
+            or response.direct_passthrough or response.is_streamed
+            or response.status_code in (204, 304) or 'Content-Encoding' in response.headers
+            or not is_compressible(response.mimetype)):
+        return response
+    response.vary.add('Accept-Encoding')
+    data = response.get_data()
+    encoding = choose_encoding(request.accept_encodings)
+    if encoding is None or len(data) < app.config['COMPRESS_MIN_SIZE']:
+        return response
+    response.set_data(compress(data, encoding))
+    response.headers['Content-Encoding'] = encoding
+    # A strong ETag names exact bytes, so each encoding needs its own
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(f'{etag}-{encoding}')
+    return response
@@ -5,9 +5,10 @@ from flask_restful import Api
 from flask_sqlalchemy import SQLAlchemy
 from flask_marshmallow import Marshmallow
 from sqlalchemy import MetaData
-from flask_bcrypt import Bcrypt
 from dotenv import load_dotenv
 import os
+from routing import RoutingSession, REPLICA_BIND, stick_to_primary
+from json_provider import FastJSONProvider, output_json
 
 # Load environment variables
 load_dotenv()
@@ -28,10 +29,46 @@ app.config.update(
     SQLALCHEMY_TRACK_MODIFICATIONS=False,
     SESSION_COOKIE_SAMESITE='None',
     SESSION_COOKIE_SECURE=True,
+    # Password hashing: bcrypt cost factor, worker processes (0 = hash inline),
+    # how many jobs may wait for a worker, and how long a request waits for one
+    BCRYPT_LOG_ROUNDS=int(os.getenv('BCRYPT_LOG_ROUNDS', 12)),
+    BCRYPT_WORKERS=int(os.getenv('BCRYPT_WORKERS', os.cpu_count() or 1)),
+    BCRYPT_MAX_PENDING=int(os.getenv('BCRYPT_MAX_PENDING', 4 * (os.cpu_count() or 1))),
+    BCRYPT_TIMEOUT=float(os.getenv('BCRYPT_TIMEOUT', 10)),
+    # Serialized game fragments for GET /games: 'memory' (per-process LRU
+    # capped at FRAGMENT_CACHE_BYTES), 'redis' (FRAGMENT_CACHE_URL) or 'none'
+    FRAGMENT_CACHE=os.getenv('FRAGMENT_CACHE', 'memory'),
+    FRAGMENT_CACHE_BYTES=int(os.getenv('FRAGMENT_CACHE_BYTES', 32 * 1024 * 1024)),
+    FRAGMENT_CACHE_URL=os.getenv('FRAGMENT_CACHE_URL', 'redis://localhost:6379/0'),
+    FRAGMENT_CACHE_TTL=int(os.getenv('FRAGMENT_CACHE_TTL', 24 * 3600)),
+    # Change log behind GET /sync: how long entries are kept before
+    # `flask compact-changelog` removes them
+    CHANGE_LOG_RETENTION_DAYS=int(os.getenv('CHANGE_LOG_RETENTION_DAYS', 30)),
+    # SQLite connection settings (see sqlite_mode.py); an empty journal mode
+    # or synchronous value leaves SQLite's default. With SERIALIZE_WRITES,
+    # write transactions in a process wait for each other, up to WRITE_TIMEOUT
+    # seconds, instead of failing with "database is locked"
+    SQLITE_JOURNAL_MODE=os.getenv('SQLITE_JOURNAL_MODE', 'wal'),
+    SQLITE_SYNCHRONOUS=os.getenv('SQLITE_SYNCHRONOUS', 'normal'),
+    SQLITE_BUSY_TIMEOUT_MS=int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+    SQLITE_MMAP_SIZE=int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+    SQLITE_CACHE_SIZE_KB=int(os.getenv('SQLITE_CACHE_SIZE_KB', 64 * 1024)),
+    SQLITE_SERIALIZE_WRITES=os.getenv('SQLITE_SERIALIZE_WRITES', 'true').lower() in ('1', 'true'),
+    SQLITE_WRITE_TIMEOUT=float(os.getenv('SQLITE_WRITE_TIMEOUT', 30)),
+    # Threads per process running the Flask app under the ASGI server (asgi.py)
+    ASGI_THREADS=int(os.getenv('ASGI_THREADS', 16)),
+    # Compression of API responses (see compression.py): bodies from
+    # COMPRESS_MIN_SIZE bytes, brotli when installed and accepted, else gzip
+    COMPRESS_RESPONSES=os.getenv('COMPRESS_RESPONSES', 'true').lower() in ('1', 'true'),
+    COMPRESS_MIN_SIZE=int(os.getenv('COMPRESS_MIN_SIZE', 1024)),
+    COMPRESS_GZIP_LEVEL=int(os.getenv('COMPRESS_GZIP_LEVEL', 6)),
+    COMPRESS_BROTLI_QUALITY=int(os.getenv('COMPRESS_BROTLI_QUALITY', 4)),
 )
 
-# JSON configuration
-app.json.compact = False
+# JSON configuration: orjson when installed (see json_provider.py), compact
+# in production and indented in development when debugging
+app.json = FastJSONProvider(app)
+app.json.compact = True if is_prod else None
 
 # Database configuration - simplified
 if is_prod:
@@ -43,17 +80,55 @@ else:
 
 app.config['SQLALCHEMY_DATABASE_URI'] = db_uri
 
+
+def engine_options(uri):
+    """
+    Pool settings for an engine: pre-ping and recycle drop connections the
+    server closed while idle; pool size, overflow and timeout bound how many
+    connections a process holds and how long a request waits for one.
+    SQLite gets only the first two, and a statement timeout only applies to
+    Postgres (DB_STATEMENT_TIMEOUT_MS, 0 = none).
+    """
+    options = {
+        'pool_pre_ping': os.getenv('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true'),
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', 1800)),
+    }
+    if uri.startswith('sqlite'):
+        return options
+    options.update(
+        pool_size=int(os.getenv('DB_POOL_SIZE', 5)),
+        max_overflow=int(os.getenv('DB_MAX_OVERFLOW', 10)),
+        pool_timeout=float(os.getenv('DB_POOL_TIMEOUT', 30)),
+    )
+    timeout = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', 0))
+    if timeout and uri.startswith('postgres'):
+        options['connect_args'] = {'options': f'-c statement_timeout={timeout}'}
+    return options
+
+
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(db_uri)
+# Optional read replica: resources marked @read_replica read from it, and a
+# client stays on the primary for DATABASE_REPLICA_STICKY_SECONDS after a write
+replica_uri = os.getenv('DATABASE_REPLICA_URI')
+app.config['SQLALCHEMY_BINDS'] = (
+    {REPLICA_BIND: {'url': replica_uri, **engine_options(replica_uri)}} if replica_uri else {}
+)
+app.config['DATABASE_REPLICA_STICKY_SECONDS'] = float(os.getenv('DATABASE_REPLICA_STICKY_SECONDS', 5))
+app.after_request(stick_to_primary)
+
 # Database setup
 metadata = MetaData(naming_convention={
     "fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s",
 })
-db = SQLAlchemy(metadata=metadata)
+# Keep loaded state after commit so responses can be serialized without
+# reloading every relationship (the session is discarded per request anyway)
+db = SQLAlchemy(metadata=metadata, session_options={'expire_on_commit': False, 'class_': RoutingSession})
 migrate = Migrate(app, db)
 db.init_app(app)
 
 # Additional extensions
-bcrypt = Bcrypt(app)
 api = Api(app)
+api.representation('application/json')(output_json)
 ma = Marshmallow(app)
 
 # CORS configuration - simplified
@@ -65,7 +140,7 @@ CORS(app,
      supports_credentials=True, 
      origins=origins,
      allow_headers=["Content-Type", "Authorization"],
-     expose_headers=["Content-Type", "Authorization"])
+     expose_headers=["Content-Type", "Authorization", "Server-Timing", "ETag", "Content-Disposition"])
 
 # SPA routing support - handle 404s for frontend routes
 @app.errorhandler(404)
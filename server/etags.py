@@ -0,0 +1,50 @@
+import hashlib
+from flask import request
+from sqlalchemy import select, func
+from werkzeug.http import quote_etag
+from config import db
+from models import User, Game
+
+
+def etag_query(user_id):
+    """User.version and the count and sum of the user's game versions, in one row."""
+    return (
+        select(User.version, func.count(Game.id), func.coalesce(func.sum(Game.version), 0))
+        .outerjoin(Game, Game.user_id == User.id)
+        .where(User.id == user_id)
+        .group_by(User.id, User.version)
+    )
+
+
+def format_etag(user_id, row, query_string):
+    """The tag for an etag_query row; the query string is mixed in because expand/fields/cursor change the body."""
+    variant = hashlib.blake2b(query_string, digest_size=4).hexdigest()
+    return f'{user_id}.{row[0]}.{row[1]}.{row[2]}.{variant}'
+
+
+def user_etag(user_id):
+    """
+    Weak ETag for the user's game data, computed without serializing
+    anything: one aggregate over User.version and the count and sum of their
+    games' versions. Every change bumps one of these, and User.version goes
+    up whenever a game is added or removed, so a tag is never reused.
+    Returns None when the user does not exist.
+    """
+    row = db.session.execute(etag_query(user_id)).first()
+    if row is None:
+        return None
+    return format_etag(user_id, row, request.query_string)
+
+
+def etag_headers(etag):
+    """Headers for a response tagged with `etag`; clients must revalidate before reuse."""
+    if etag is None:
+        return {}
+    return {'ETag': quote_etag(etag, weak=True), 'Cache-Control': 'private, no-cache'}
+
+
+def not_modified(etag):
+    """A 304 response when If-None-Match already holds `etag`, else None."""
+    if etag is not None and request.if_none_match.contains_weak(etag):
+        return '', 304, etag_headers(etag)
+    return None
@@ -0,0 +1,65 @@
+import zlib
+from datetime import datetime, timezone
+from sqlalchemy import select
+from config import db
+from json_provider import dumps
+from models import User, Game, Player, Session, Character
+from schemas import GameSchema, SessionSchema, PlayerSchema, CharacterSchema
+
+# Rows fetched per round trip while streaming; memory use is bounded by this
+EXPORT_BATCH = 500
+# Version of the line format below, written in the header line so readers can
+# tell archives apart if it ever changes
+EXPORT_FORMAT = 1
+
+# Plain column rows are dumped through the schemas (marshmallow reads mappings
+# too), so nothing is added to the session's identity map while streaming.
+_sections = (
+    ('game', GameSchema(exclude=('players', 'sessions'), many=True)),
+    ('session', SessionSchema(many=True)),
+    ('player', PlayerSchema(exclude=('characters',), many=True)),
+    ('character', CharacterSchema(many=True)),
+)
+
+
+def _queries(user_id):
+    in_user_games = select(Game.id).where(Game.user_id == user_id)
+    return {
+        'game': select(*Game.__table__.c).where(Game.user_id == user_id).order_by(Game.id),
+        'session': select(*Session.__table__.c).where(Session.game_id.in_(in_user_games)).order_by(Session.id),
+        'player': select(*Player.__table__.c).where(
+            Player.id.in_(select(Character.player_id).where(Character.game_id.in_(in_user_games)))
+        ).order_by(Player.id),
+        'character': select(*Character.__table__.c).where(Character.game_id.in_(in_user_games)).order_by(Character.id),
+    }
+
+
+def export_lines(user_id):
+    """
+    Yield the user's archive as NDJSON, one chunk of lines per batch: a
+    header line, then games, sessions, players and characters, each line
+    {"type": ..., <fields>}. Rows are streamed with yield_per (a server-side
+    cursor where the driver supports one).
+    """
+    username = db.session.scalar(select(User.username).where(User.id == user_id))
+    header = {
+        'type': 'export', 'format': EXPORT_FORMAT, 'username': username,
+        'exported_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+    }
+    yield dumps(header) + b'\n'
+    queries = _queries(user_id)
+    for kind, schema in _sections:
+        result = db.session.execute(queries[kind].execution_options(yield_per=EXPORT_BATCH))
+        for rows in result.partitions():
+            dumped = schema.dump([row._mapping for row in rows])
+            yield b''.join(dumps({'type': kind, **data}) + b'\n' for data in dumped)
+
+
+def gzip_stream(chunks):
+    """Gzip a stream of byte chunks as they are produced."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
@@ -0,0 +1,167 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session as OrmSession
+from config import app, db
+from instrumentation import Gauge, register
+from json_provider import dumps
+from models import Game
+
+# Hit/miss totals for /metrics
+_stats = {'hits': 0, 'misses': 0}
+
+
+class LRUBackend:
+    """In-process LRU of fragments; least recently used ones go once max_bytes is exceeded."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()  # (game_id, variant) -> bytes
+        self._by_game = {}             # game_id -> variants cached for it
+        self._lock = threading.Lock()
+
+    def get_many(self, keys):
+        found = {}
+        with self._lock:
+            for key in keys:
+                data = self._entries.get(key)
+                if data is not None:
+                    self._entries.move_to_end(key)
+                    found[key] = data
+        return found
+
+    def set(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = data
+            self._by_game.setdefault(key[0], set()).add(key[1])
+            self.size += len(data)
+            while self.size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, game_ids):
+        with self._lock:
+            for game_id in game_ids:
+                for variant in list(self._by_game.get(game_id, ())):
+                    self._remove((game_id, variant))
+
+    def _remove(self, key):
+        data = self._entries.pop(key, None)
+        if data is None:
+            return
+        self.size -= len(data)
+        variants = self._by_game[key[0]]
+        variants.discard(key[1])
+        if not variants:
+            del self._by_game[key[0]]
+
+
+class RedisBackend:
+    """
+    Fragments in a Redis-compatible server, shared by every process. Each
+    game is one hash so invalidation is a single DEL. Server errors are
+    treated as misses so the cache can never take the API down.
+    """
+
+    def __init__(self, url, ttl):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("FRAGMENT_CACHE=redis requires the 'redis' package")
+        self._client = redis.Redis.from_url(url)
+        self._errors = redis.RedisError
+        self.ttl = ttl
+
+    @staticmethod
+    def _name(game_id):
+        return f'game-fragments:{game_id}'
+
+    def get_many(self, keys):
+        try:
+            pipe = self._client.pipeline(transaction=False)
+            for game_id, variant in keys:
+                pipe.hget(self._name(game_id), variant)
+            values = pipe.execute()
+        except self._errors:
+            return {}
+        return {key: data for key, data in zip(keys, values) if data is not None}
+
+    def set(self, key, data):
+        name = self._name(key[0])
+        try:
+            self._client.pipeline(transaction=False).hset(name, key[1], data).expire(name, self.ttl).execute()
+        except self._errors:
+            pass
+
+    def invalidate(self, game_ids):
+        if not game_ids:
+            return
+        try:
+            self._client.delete(*(self._name(game_id) for game_id in game_ids))
+        except self._errors:
+            pass
+
+
+def _create_backend():
+    kind = app.config['FRAGMENT_CACHE']
+    if kind == 'memory':
+        return LRUBackend(app.config['FRAGMENT_CACHE_BYTES'])
+    if kind == 'redis':
+        return RedisBackend(app.config['FRAGMENT_CACHE_URL'], app.config['FRAGMENT_CACHE_TTL'])
+    if kind == 'none':
+        return None
+    raise ValueError(f"Unknown FRAGMENT_CACHE backend '{kind}'")
+
+
+backend = _create_backend()
+register(Gauge('fragment_cache_hits_total', 'Game fragments served from the cache.',
+               lambda: _stats['hits'], kind='counter'))
+register(Gauge('fragment_cache_misses_total', 'Game fragments that had to be serialized.',
+               lambda: _stats['misses'], kind='counter'))
+if isinstance(backend, LRUBackend):
+    register(Gauge('fragment_cache_bytes', 'Size of the in-process fragment cache.', lambda: backend.size))
+
+
+@event.listens_for(OrmSession, 'after_flush')
+def invalidate_changed_games(session, flush_context):
+    # Runs after models.bump_versions, which collects the changed game ids.
+    # Keys also carry the version, so entries another process cached are
+    # never served stale; this just frees their space early.
+    changed = session.info.pop('changed_game_ids', None)
+    if changed and backend is not None:
+        backend.invalidate(changed)
+
+
+def encode(data):
+    return dumps(data)
+
+
+def game_fragments(schema, games, options):
+    """
+    Serialized JSON (bytes) for each game, in order. Fragments are keyed by
+    game id, version and the schema's field selection. Games that miss get
+    their relationships loaded with `options` in one pass and are dumped
+    together, then cached. Games deleted in the meantime are left out.
+    """
+    variant = hashlib.blake2b(
+        repr((sorted(schema.only or ()), sorted(schema.exclude))).encode('utf-8'), digest_size=8
+    ).hexdigest()
+    keys = {game.id: (game.id, f'{game.version}:{variant}') for game in games}
+    found = backend.get_many(list(keys.values())) if backend is not None else {}
+    fragments = {game_id: found[key] for game_id, key in keys.items() if key in found}
+    missing = [game.id for game in games if game.id not in fragments]
+    _stats['hits'] += len(fragments)
+    _stats['misses'] += len(missing)
+    if missing:
+        stmt = select(Game).where(Game.id.in_(missing)).options(*options)
+        loaded = db.session.scalars(stmt.execution_options(populate_existing=True)).unique().all()
+        for game, data in zip(loaded, schema.dump(loaded, many=True)):
+            fragments[game.id] = encode(data)
+            if backend is not None:
+                # The reload may have seen a newer version than the page query
+                backend.set((game.id, f'{game.version}:{variant}'), fragments[game.id])
+    return [fragments[game.id] for game in games if game.id in fragments]
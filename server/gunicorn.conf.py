@@ -0,0 +1,22 @@
+"""
+Production settings for the WSGI build: gunicorn -c gunicorn.conf.py app:app
+
+Each worker process runs GUNICORN_THREADS request threads, so keep the
+database pool (DB_POOL_SIZE + DB_MAX_OVERFLOW in config.py) at least that
+large, and lower BCRYPT_WORKERS when running many workers, since every worker
+starts its own bcrypt pool. The ASGI build runs under uvicorn instead; see
+asgi.py.
+"""
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5555')}"
+workers = int(os.getenv('WEB_CONCURRENCY', os.cpu_count() or 1))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', 8))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = 30
+keepalive = 5
+# Recycle workers now and then so slow leaks cannot build up
+max_requests = 2000
+max_requests_jitter = 200
+accesslog = '-'
@@ -0,0 +1,240 @@
+import argparse
+import csv
+import gzip
+import io
+import json
+import sys
+from marshmallow import ValidationError
+from sqlalchemy import select, insert, or_, and_
+from sqlalchemy.exc import DBAPIError
+from config import app, db
+from json_provider import loads
+from models import User, Game, Player, Session, Character, touch_games
+from schemas import SessionSchema, CharacterSchema
+
+# Rows validated, inserted and committed together
+IMPORT_CHUNK = 1000
+# Row errors listed in the report; the rest are only counted
+MAX_REPORTED_ERRORS = 1000
+
+session_schema = SessionSchema()
+character_schema = CharacterSchema()
+
+
+def read_rows(stream, fmt):
+    """
+    Parse an NDJSON or CSV byte stream incrementally. Yields (line number,
+    row, problem) where row is a dict, or None when the line could not be
+    parsed and `problem` says why. Empty CSV cells count as missing.
+    """
+    text = io.TextIOWrapper(stream, encoding='utf-8', newline='')
+    if fmt == 'csv':
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, {k: v for k, v in row.items() if k and v not in ('', None)}, None
+        return
+    for number, line in enumerate(text, 1):
+        if not line.strip():
+            continue
+        try:
+            row = loads(line)
+        except ValueError:
+            yield number, None, 'Invalid JSON'
+            continue
+        if not isinstance(row, dict):
+            yield number, None, 'Each line must be a JSON object'
+            continue
+        yield number, row, None
+
+
+class CampaignImport:
+    """
+    Bulk-import sessions and characters into a user's games.
+
+    Rows are handled IMPORT_CHUNK at a time: validated with the schemas
+    (many=True), checked against the user's games with one query, player
+    names resolved with one query (unknown names become new players in one
+    INSERT), written with one multi-row INSERT per table and committed.
+    Bad rows are reported by line and skipped; the rest still go in.
+
+    Rows need a `type` of 'session' or 'character' unless `default_type` is
+    given, and a `game_id` unless `game_id` is. Characters name their player
+    with `player` (matched against the user's roster) or `player_id`.
+    """
+
+    def __init__(self, user_id, game_id=None, default_type=None):
+        self.user_id = user_id
+        self.game_id = game_id
+        self.default_type = default_type
+        self.counts = {'sessions': 0, 'characters': 0, 'players': 0}
+        self.errors = []
+        self.error_count = 0
+
+    def error(self, line, messages):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'errors': messages})
+
+    def run(self, rows):
+        chunk = []
+        for line, row, problem in rows:
+            if problem:
+                self.error(line, {'_row': [problem]})
+                continue
+            chunk.append((line, row))
+            if len(chunk) >= IMPORT_CHUNK:
+                self.import_chunk(chunk)
+                chunk = []
+        if chunk:
+            self.import_chunk(chunk)
+        return self.report()
+
+    def report(self):
+        errors = sorted(self.errors, key=lambda e: e['line'])
+        return {'imported': self.counts, 'error_count': self.error_count, 'errors': errors}
+
+    def import_chunk(self, chunk):
+        sessions, characters = [], []
+        for line, row in chunk:
+            kind = row.pop('type', None) or self.default_type
+            # Ids from an export belong to the source database
+            row.pop('id', None)
+            if self.game_id is not None:
+                row['game_id'] = self.game_id
+            if kind == 'session':
+                sessions.append((line, row, None))
+            elif kind == 'character':
+                characters.append((line, row, row.pop('player', None)))
+            else:
+                self.error(line, {'type': [f"Expected 'session' or 'character', got {kind!r}"]})
+
+        sessions = self.validate(session_schema, sessions)
+        characters = self.validate(character_schema, characters, partial=('player_id',))
+        sessions, characters = self.check_games(sessions, characters)
+        try:
+            # New players are inserted here too, so a failure leaves no orphans
+            characters, created = self.resolve_players(characters)
+            session_rows = [dict({'summary': None}, **data) for _, data, _ in sessions]
+            character_rows = [dict({'icon': None, 'is_active': True}, **data) for _, data, _ in characters]
+            if session_rows:
+                db.session.execute(insert(Session.__table__), session_rows)
+            if character_rows:
+                db.session.execute(insert(Character.__table__), character_rows)
+            touch_games(db.session, {row['game_id'] for row in session_rows + character_rows})
+            db.session.commit()
+        except DBAPIError as err:
+            db.session.rollback()
+            for line, _, _ in sessions + characters:
+                self.error(line, {'_chunk': [f'Chunk could not be saved: {err.orig}']})
+            return
+        self.counts['sessions'] += len(session_rows)
+        self.counts['characters'] += len(character_rows)
+        self.counts['players'] += created
+
+    def validate(self, schema, items, **kwargs):
+        """Load rows as one batch; returns the valid (line, data, extra) items."""
+        if not items:
+            return []
+        try:
+            loaded = schema.load([row for _, row, _ in items], many=True, **kwargs)
+            invalid = {}
+        except ValidationError as err:
+            loaded, invalid = err.valid_data, err.messages
+        valid = []
+        for i, (line, _, extra) in enumerate(items):
+            if i in invalid:
+                self.error(line, invalid[i])
+            else:
+                valid.append((line, loaded[i], extra))
+        return valid
+
+    def check_games(self, sessions, characters):
+        """Drop rows whose game is missing or belongs to another user."""
+        game_ids = {data['game_id'] for _, data, _ in sessions + characters}
+        owned = set(db.session.scalars(
+            select(Game.id).where(Game.id.in_(game_ids), Game.user_id == self.user_id)))
+        results = []
+        for items in (sessions, characters):
+            kept = []
+            for line, data, extra in items:
+                if data['game_id'] in owned:
+                    kept.append((line, data, extra))
+                else:
+                    self.error(line, {'game_id': ['Game not found.']})
+            results.append(kept)
+        return results
+
+    def resolve_players(self, characters):
+        """
+        Fill in player_id for each character, creating players for names not
+        in the user's roster. Returns (characters, players created).
+        """
+        names = {name for _, _, name in characters if name}
+        ids = {data['player_id'] for _, data, name in characters if not name and 'player_id' in data}
+        if not names and not ids:
+            for line, _, _ in characters:
+                self.error(line, {'player': ['Give a player name or player_id.']})
+            return [], 0
+        roster = select(Character.player_id).join(Game).where(Game.user_id == self.user_id)
+        found = db.session.execute(
+            select(Player.id, Player.name, Player.id.in_(roster).label('in_roster'))
+            .where(or_(Player.id.in_(ids), and_(Player.name.in_(names), Player.id.in_(roster))))
+            .order_by(Player.id)
+        ).all()
+        known_ids = {row.id for row in found}
+        by_name = {}
+        for row in found:
+            if row.in_roster:
+                by_name.setdefault(row.name, row.id)
+        new_names = sorted(names - set(by_name))
+        if new_names:
+            created = db.session.execute(
+                insert(Player.__table__).returning(Player.id, Player.name),
+                [{'name': name, 'summary': None} for name in new_names])
+            by_name.update({name: player_id for player_id, name in created})
+
+        resolved = []
+        for line, data, name in characters:
+            if name:
+                data['player_id'] = by_name[name]
+            elif data.get('player_id') not in known_ids:
+                self.error(line, {'player_id': ['Player not found.']} if 'player_id' in data
+                           else {'player': ['Give a player name or player_id.']})
+                continue
+            resolved.append((line, data, name))
+        return resolved, len(new_names)
+
+
+def open_upload(stream, content_encoding=None):
+    """Wrap an uploaded byte stream, un-gzipping it on the fly when needed."""
+    if content_encoding == 'gzip':
+        return gzip.GzipFile(fileobj=stream)
+    return stream
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Bulk-import sessions and characters from NDJSON or CSV into a user's games.")
+    parser.add_argument('file', help="path to the file ('-' for stdin); .gz files are decompressed")
+    parser.add_argument('--user', required=True, help="username that owns the target games")
+    parser.add_argument('--format', choices=('ndjson', 'csv'), help="default: from the file extension")
+    parser.add_argument('--type', choices=('session', 'character'), help="row type for rows without one")
+    parser.add_argument('--game-id', type=int, help="import every row into this game")
+    args = parser.parse_args()
+
+    name = args.file[:-3] if args.file.endswith('.gz') else args.file
+    fmt = args.format or ('csv' if name.endswith('.csv') else 'ndjson')
+    raw = sys.stdin.buffer if args.file == '-' else open(args.file, 'rb')
+    stream = open_upload(raw, 'gzip' if args.file.endswith('.gz') else None)
+
+    with app.app_context():
+        user_id = db.session.scalar(select(User.id).where(User.username == args.user))
+        if user_id is None:
+            sys.exit(f"No user named {args.user!r}")
+        report = CampaignImport(user_id, game_id=args.game_id, default_type=args.type).run(read_rows(stream, fmt))
+    for table, count in report['imported'].items():
+        print(f"Imported {count} {table}")
+    for error in report['errors']:
+        print(f"line {error['line']}: {json.dumps(error['errors'])}")
+    if report['error_count'] > len(report['errors']):
+        print(f"... and {report['error_count'] - len(report['errors'])} more errors")
@@ -0,0 +1,167 @@
+import threading
+from contextlib import contextmanager
+from functools import wraps
+from time import perf_counter
+from flask import g, request, has_request_context, Response
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from config import app
+
+# Histogram buckets (seconds for timings, statements for query counts)
+TIME_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    """Minimal Prometheus-style histogram; observations are keyed by label values."""
+
+    def __init__(self, name, help_text, buckets, label_names=('endpoint', 'method')):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.label_names = label_names
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['buckets'][i] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for labels, series in sorted(self._series.items()):
+                label = ','.join(f'{k}="{v}"' for k, v in zip(self.label_names, labels))
+                for bound, count in zip(self.buckets, series['buckets']):
+                    lines.append(f'{self.name}_bucket{{{label},le="{bound}"}} {count}')
+                lines.append(f'{self.name}_bucket{{{label},le="+Inf"}} {series["count"]}')
+                lines.append(f'{self.name}_sum{{{label}}} {series["sum"]}')
+                lines.append(f'{self.name}_count{{{label}}} {series["count"]}')
+        return '\n'.join(lines)
+
+
+class Gauge:
+    """A single value read from a callback at scrape time (use kind='counter' for totals)."""
+
+    def __init__(self, name, help_text, read, kind='gauge'):
+        self.name = name
+        self.help_text = help_text
+        self.read = read
+        self.kind = kind
+
+    def render(self):
+        return '\n'.join([
+            f'# HELP {self.name} {self.help_text}',
+            f'# TYPE {self.name} {self.kind}',
+            f'{self.name} {self.read()}',
+        ])
+
+
+request_duration = Histogram(
+    'http_request_duration_seconds', 'Total time spent handling the request.', TIME_BUCKETS)
+db_duration = Histogram(
+    'db_query_duration_seconds', 'Time spent executing SQL per request.', TIME_BUCKETS)
+serialization_duration = Histogram(
+    'serialization_duration_seconds', 'Time spent in marshmallow dump per request.', TIME_BUCKETS)
+queries_per_request = Histogram(
+    'db_queries_per_request', 'Number of SQL statements issued per request.', COUNT_BUCKETS)
+# Everything served by /metrics; other modules add their own with register()
+METRICS = [request_duration, db_duration, serialization_duration, queries_per_request]
+
+
+def register(metric):
+    METRICS.append(metric)
+    return metric
+
+
+# Count and time every SQL statement issued while handling a request
+@event.listens_for(Engine, 'before_cursor_execute')
+def start_statement(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        g.query_count = g.get('query_count', 0) + 1
+        conn.info.setdefault('query_start', []).append(perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def end_statement(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('query_start')
+    if has_request_context() and starts:
+        g.db_time = g.get('db_time', 0.0) + perf_counter() - starts.pop()
+
+
+@contextmanager
+def serialization_timer():
+    """Accumulate time spent serializing; nested dumps are only counted once."""
+    if not has_request_context() or g.get('in_dump'):
+        yield
+        return
+    g.in_dump = True
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        g.in_dump = False
+        g.serialize_time = g.get('serialize_time', 0.0) + perf_counter() - start
+
+
+def query_budget(limit):
+    """
+    Declare the maximum number of SQL statements a resource method may issue.
+    Enforced only when the app runs in testing mode.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            g.query_budget = limit
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@app.before_request
+def start_request_timer():
+    g.request_start = perf_counter()
+
+
+@app.after_request
+def record_request_metrics(response):
+    count = g.get('query_count', 0)
+    budget = g.get('query_budget')
+    if app.testing and budget is not None and count > budget:
+        raise AssertionError(
+            f"{request.method} {request.path} issued {count} queries, budget is {budget}"
+        )
+    if 'request_start' not in g or request.endpoint == 'metrics':
+        return response
+
+    total = perf_counter() - g.request_start
+    db_time = g.get('db_time', 0.0)
+    serialize_time = g.get('serialize_time', 0.0)
+    labels = (request.endpoint or 'unknown', request.method)
+    request_duration.observe(labels, total)
+    db_duration.observe(labels, db_time)
+    serialization_duration.observe(labels, serialize_time)
+    queries_per_request.observe(labels, count)
+
+    response.headers['Server-Timing'] = ', '.join([
+        f'db;dur={db_time * 1000:.2f};desc="{count} queries"',
+        f'serialize;dur={serialize_time * 1000:.2f}',
+        f'total;dur={total * 1000:.2f}',
+    ])
+    return response
+
+
+@app.route('/metrics')
+def metrics():
+    # Only scrapeable from the local machine
+    if request.remote_addr not in ('127.0.0.1', '::1'):
+        return {'error': 'Not found.'}, 404
+    body = '\n\n'.join(m.render() for m in METRICS) + '\n'
+    return Response(body, mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,81 @@
+"""
+JSON encoding for every response: Flask's app.json, Flask-RESTful's
+application/json representation, the fragment cache and the export stream.
+Uses orjson (in requirements.txt) and falls back to the standard library
+when it is missing; both produce the same JSON.
+"""
+import json
+from datetime import date
+from decimal import Decimal
+from flask import current_app, make_response
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(o):
+    """Types neither encoder handles natively. orjson never gets here for dates."""
+    if isinstance(o, date):
+        return o.isoformat()
+    if isinstance(o, Decimal):
+        return str(o)
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+    raise TypeError(f'Object of type {type(o).__name__} is not JSON serializable')
+
+
+def dumps(obj, pretty=False, sort_keys=False):
+    """`obj` as UTF-8 JSON bytes, compact unless `pretty` (two-space indent)."""
+    if orjson is not None:
+        # Marshmallow error dicts can have int keys (list indexes)
+        option = orjson.OPT_NON_STR_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=_default, option=option)
+    if pretty:
+        text = json.dumps(obj, default=_default, indent=2, sort_keys=sort_keys)
+    else:
+        text = json.dumps(obj, default=_default, separators=(',', ':'), sort_keys=sort_keys)
+    return text.encode('utf-8')
+
+
+def loads(s):
+    return orjson.loads(s) if orjson is not None else json.loads(s)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    app.json backed by dumps()/loads(). `compact` works as in Flask: True
+    for compact output, False to indent, None to indent only in debug mode.
+    Dates are written as ISO 8601 rather than HTTP dates.
+    """
+    sort_keys = False
+
+    def _pretty(self):
+        return self.compact is False or (self.compact is None and self._app.debug)
+
+    def encode(self, obj):
+        return dumps(obj, pretty=self._pretty(), sort_keys=self.sort_keys) + b'\n'
+
+    def dumps(self, obj, **kwargs):
+        return dumps(obj, pretty=kwargs.get('indent') is not None,
+                     sort_keys=kwargs.get('sort_keys', self.sort_keys)).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.encode(obj), mimetype=self.mimetype)
+
+
+def output_json(data, code, headers=None):
+    """Flask-RESTful representation for application/json, encoded by app.json."""
+    response = make_response(current_app.json.encode(data), code)
+    response.headers.extend(headers or {})
+    return response
@@ -0,0 +1,56 @@
+"""Added full-text search indexes
+
+Revision ID: 7d3f2a9c1e84
+Revises: 048744cb6332
+Create Date: 2026-10-18 14:02:41.306518
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '7d3f2a9c1e84'
+down_revision = '048744cb6332'
+branch_labels = None
+depends_on = None
+
+# (source table, SQLite FTS5 table, indexed columns), as in search.py
+SOURCES = (
+    ('sessions', 'sessions_fts', ('summary',)),
+    ('games', 'games_fts', ('description', 'setting')),
+    ('players', 'players_fts', ('summary',)),
+)
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    for source, fts, columns in SOURCES:
+        cols = ', '.join(columns)
+        if dialect == 'sqlite':
+            new = ', '.join(f'new.{c}' for c in columns)
+            old = ', '.join(f'old.{c}' for c in columns)
+            remove = f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old});"
+            add = f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new});"
+            op.execute(f"CREATE VIRTUAL TABLE {fts} USING fts5({cols}, content='{source}', "
+                       f"content_rowid='id', tokenize='porter unicode61')")
+            op.execute(f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {source} BEGIN {add} END")
+            op.execute(f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {source} BEGIN {remove} END")
+            op.execute(f"CREATE TRIGGER {fts}_au AFTER UPDATE OF {cols} ON {source} "
+                       f"BEGIN {remove} {add} END")
+            # Index the rows that already exist
+            op.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+        elif dialect == 'postgresql':
+            document = " || ' ' || ".join(f"coalesce({c}, '')" for c in columns)
+            op.execute(f"CREATE INDEX ix_{source}_search ON {source} "
+                       f"USING GIN (to_tsvector('english', {document}))")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    for source, fts, columns in SOURCES:
+        if dialect == 'sqlite':
+            for suffix in ('ai', 'ad', 'au'):
+                op.execute(f"DROP TRIGGER IF EXISTS {fts}_{suffix}")
+            op.execute(f"DROP TABLE IF EXISTS {fts}")
+        elif dialect == 'postgresql':
+            op.execute(f"DROP INDEX IF EXISTS ix_{source}_search")
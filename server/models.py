@@ -1,10 +1,24 @@
 from sqlalchemy.ext.associationproxy import association_proxy
 from sqlalchemy.ext.hybrid import hybrid_property
-from sqlalchemy.orm import validates
+from sqlalchemy.orm import validates, Session as OrmSession
+from sqlalchemy.orm.attributes import get_history
+from itertools import chain
+from datetime import datetime, timezone
 
 # Ensure necessary imports
-from config import db, bcrypt
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey
+from config import db
+from passwords import hash_password, check_password, needs_rehash
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, select, update, insert, or_, event, func, literal
+from sqlalchemy.dialects import postgresql, sqlite
+
+def utcnow():
+    """Naive UTC now, the clock every stored timestamp is compared against."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+# Every relationship is lazy="raise": endpoints must say what they load
+# (see the loader options in app.py and ExpandableSchema in schemas.py)
+# instead of silently fanning out into extra SELECTs.
 
 class User(db.Model):
     __tablename__ = 'users'
@@ -12,12 +26,14 @@ class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(30), unique=True, nullable=False)
     _password_hash = db.Column(db.String(128), nullable=False)
+    # Bumped when the user's set of games changes (see bump_versions)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
 
     games = db.relationship(
         "Game",
         back_populates="user",
         cascade="all, delete-orphan",
-        lazy="selectin"
+        lazy="raise"
     )
     # Players accessible via games → characters
     players = association_proxy("games", "players")
@@ -28,16 +44,23 @@ class User(db.Model):
 
     @password_hash.setter
     def password_hash(self, password):
-        password_hash = bcrypt.generate_password_hash(password.encode('utf-8'))
-        self._password_hash = password_hash.decode('utf-8')
+        # Hashing runs in the bounded worker pool from passwords.py
+        self._password_hash = hash_password(password)
 
     def authenticate(self, password):
-        return bcrypt.check_password_hash(self._password_hash, password.encode('utf-8'))
+        return check_password(self._password_hash, password)
+
+    def password_needs_rehash(self):
+        return needs_rehash(self._password_hash)
 
 
 # --- Game model ---
 class Game(db.Model):
     __tablename__ = 'games'
+    __table_args__ = (
+        # Ownership filter plus keyset order for GET /games
+        db.Index('ix_games_user_id_id', 'user_id', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
@@ -47,24 +70,26 @@ class Game(db.Model):
     setting = db.Column(db.Text, nullable=True)
     status = db.Column(db.String(50), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    # Bumped when the game, its sessions or characters, or their players change
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
 
     user = db.relationship(
         "User",
         back_populates="games",
-        lazy="selectin"
+        lazy="raise"
     )
     sessions = db.relationship(
         "Session",
         back_populates="game",
         cascade="all, delete-orphan",
-        lazy="selectin"
+        lazy="raise"
     )
     # Characters belonging to this game
     characters = db.relationship(
         "Character",
         back_populates="game",
         cascade="all, delete-orphan",
-        lazy="selectin"
+        lazy="raise"
     )
     # Public players list, derived through those characters
     players = association_proxy(
@@ -89,7 +114,7 @@ class Player(db.Model):
         "Character",
         back_populates="player",
         cascade="all, delete-orphan",
-        lazy="selectin"
+        lazy="raise"
     )
     # Games this player is involved in via characters
     games = association_proxy(
@@ -98,11 +123,21 @@ class Player(db.Model):
         creator=lambda game_obj: Character(game=game_obj)
     )
 
+    @classmethod
+    def roster_for(cls, user_id):
+        """Select the distinct players with a character in any of the user's games."""
+        in_user_games = select(Character.player_id).join(Game).where(Game.user_id == user_id)
+        return select(cls).where(cls.id.in_(in_user_games))
+
     def __repr__(self):
         return f'<Player id={self.id} name={self.name}>'
 
 class Session(db.Model):
     __tablename__ = 'sessions'
+    __table_args__ = (
+        # A game's sessions, in date order
+        db.Index('ix_sessions_game_id_date', 'game_id', 'date'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     date = db.Column(db.Date, nullable=False)
@@ -112,7 +147,7 @@ class Session(db.Model):
     game = db.relationship(
         "Game",
         back_populates="sessions",
-        lazy="selectin"
+        lazy="raise"
     )
 
     def __repr__(self):
@@ -122,6 +157,11 @@ class Session(db.Model):
 # Character model
 class Character(db.Model):
     __tablename__ = 'characters'
+    __table_args__ = (
+        # A game's roster, and the player lookups behind it
+        db.Index('ix_characters_game_id_player_id', 'game_id', 'player_id'),
+        db.Index('ix_characters_player_id', 'player_id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
@@ -135,13 +175,278 @@ class Character(db.Model):
     player = db.relationship(
         "Player",
         back_populates="characters",
-        lazy="selectin"
+        lazy="raise"
     )
     game = db.relationship(
         "Game",
         back_populates="characters",
-        lazy="selectin"
+        lazy="raise"
     )
 
     def __repr__(self):
-        return f'<Character id={self.id} name={self.name}>'
\ No newline at end of file
+        return f'<Character id={self.id} name={self.name}>'
+
+
+class ChangeLog(db.Model):
+    """
+    One row per insert, update or delete of a game, session, character or
+    player, per user who can see it. Appended by bump_versions and read by
+    GET /sync; changelog.compact() keeps it from growing without bound.
+    """
+    __tablename__ = 'change_log'
+    __table_args__ = (
+        # A user's changes after a cursor
+        db.Index('ix_change_log_user_id_id', 'user_id', 'id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    entity = db.Column(db.String(20), nullable=False)
+    entity_id = db.Column(db.Integer, nullable=False)
+    # 'upsert' or 'delete'
+    op = db.Column(db.String(10), nullable=False)
+    # Set here rather than by the database: Postgres' now() is local time in a
+    # naive column, and compact() measures retention in UTC
+    created_at = db.Column(db.DateTime, nullable=False, default=utcnow)
+
+    def __repr__(self):
+        return f'<ChangeLog id={self.id} {self.op} {self.entity} {self.entity_id}>'
+
+
+
+class GameStats(db.Model):
+    """
+    Dashboard numbers for one game, precomputed so GET /stats never loads
+    sessions or characters. Rewritten by refresh_game_stats whenever a flush
+    (or a bulk insert, via touch_games) changes the game's sessions or
+    characters. The average party level is active_level_sum divided by
+    active_character_count, so it can also be averaged across games.
+    """
+    __tablename__ = 'game_stats'
+
+    game_id = db.Column(db.Integer, primary_key=True)
+    session_count = db.Column(db.Integer, nullable=False, default=0)
+    last_session_date = db.Column(db.Date, nullable=True)
+    character_count = db.Column(db.Integer, nullable=False, default=0)
+    active_character_count = db.Column(db.Integer, nullable=False, default=0)
+    active_level_sum = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<GameStats game_id={self.game_id} sessions={self.session_count}>'
+
+
+def _values(obj, key):
+    """Current and previous (pre-flush) values of a column attribute, minus None."""
+    history = get_history(obj, key)
+    return {v for v in chain([getattr(obj, key)], history.deleted) if v is not None}
+
+
+@event.listens_for(OrmSession, 'after_flush')
+def bump_versions(session, flush_context):
+    """
+    Keep Game.version and User.version moving whenever anything a game or
+    user payload shows changes, so ETags can be computed from the counters
+    alone, and append the flush's changes to the change log for GET /sync.
+    Costs at most two UPDATEs and two INSERTs per flush. Leaves the ids of
+    every changed game in session.info['changed_game_ids'].
+    """
+    game_ids, player_ids, user_ids = set(), set(), set()
+    changed = [
+        obj for obj in chain(session.new, session.dirty, session.deleted)
+        if obj not in session.dirty or session.is_modified(obj, include_collections=False)
+    ]
+    for obj in changed:
+        if isinstance(obj, (Session, Character)):
+            game_ids |= _values(obj, 'game_id')
+        elif isinstance(obj, Game):
+            if obj in session.dirty:
+                game_ids.add(obj.id)
+            if obj not in session.dirty or get_history(obj, 'user_id').deleted:
+                user_ids |= _values(obj, 'user_id')
+        elif isinstance(obj, Player) and obj in session.dirty:
+            player_ids.add(obj.id)
+        elif isinstance(obj, User) and obj in session.dirty:
+            user_ids.add(obj.id)
+
+    no_sync = {'synchronize_session': False}
+    # Deleted games need no bump; their user's version covers them
+    deleted = {obj.id for obj in session.deleted if isinstance(obj, Game)}
+    game_ids -= deleted
+    changed_games = []
+    if game_ids:
+        changed_games.append(Game.id.in_(game_ids))
+    if player_ids:
+        # A player's name and summary are shown inside every game they play in
+        changed_games.append(Game.id.in_(
+            select(Character.game_id).where(Character.player_id.in_(player_ids))))
+    # Owner of every game touched by this flush, for the change log
+    owners = {obj.id: obj.user_id for obj in changed if isinstance(obj, Game)}
+    if changed_games:
+        bumped = session.execute(
+            update(Game).where(or_(*changed_games)).values(version=Game.version + 1)
+            .returning(Game.id, Game.user_id),
+            execution_options=no_sync)
+        for game_id, user_id in bumped:
+            game_ids.add(game_id)
+            owners[game_id] = user_id
+    # Everything whose serialized form is now stale, for the fragment cache
+    session.info.setdefault('changed_game_ids', set()).update(game_ids | deleted)
+    if user_ids:
+        session.execute(
+            update(User).where(User.id.in_(user_ids)).values(version=User.version + 1),
+            execution_options=no_sync)
+    _log_changes(session, changed, owners, deleted, player_ids)
+
+
+def _log_changes(session, changed, owners, deleted_games, player_ids):
+    """
+    Append this flush's changes to the change log, addressed to the owner of
+    the game each row belongs to. Children of deleted games are left out;
+    the game's own delete entry covers them.
+    """
+    entries = []
+
+    def add(user_id, entity, entity_id, op):
+        if user_id is not None:
+            entries.append({'user_id': user_id, 'entity': entity, 'entity_id': entity_id, 'op': op})
+
+    for obj in changed:
+        op = 'delete' if obj in session.deleted else 'upsert'
+        if isinstance(obj, Game):
+            for old_owner in get_history(obj, 'user_id').deleted:
+                add(old_owner, 'game', obj.id, 'delete')
+            add(obj.user_id, 'game', obj.id, op)
+        elif isinstance(obj, (Session, Character)):
+            if obj.game_id in deleted_games:
+                continue
+            entity = 'session' if isinstance(obj, Session) else 'character'
+            # Moved to another user's game: gone from the old owner's view
+            for old_game in get_history(obj, 'game_id').deleted:
+                if owners.get(old_game) != owners.get(obj.game_id):
+                    add(owners.get(old_game), entity, obj.id, 'delete')
+            add(owners.get(obj.game_id), entity, obj.id, op)
+            # A character can bring a player into the owner's roster
+            if isinstance(obj, Character) and op == 'upsert' and (
+                    obj in session.new or get_history(obj, 'player_id').deleted):
+                add(owners.get(obj.game_id), 'player', obj.player_id, 'upsert')
+        elif isinstance(obj, Player) and op == 'delete':
+            seen = set()
+            for char in session.deleted:
+                if isinstance(char, Character) and char.player_id == obj.id:
+                    user_id = owners.get(char.game_id)
+                    if user_id not in seen:
+                        seen.add(user_id)
+                        add(user_id, 'player', obj.id, 'delete')
+
+    if entries:
+        session.execute(insert(ChangeLog.__table__), entries)
+    if player_ids:
+        # Edited players reach every user with one of their characters in a game
+        owners_of_players = (
+            select(Game.user_id, literal('player'), Character.player_id, literal('upsert'))
+            .join(Character, Character.game_id == Game.id)
+            .where(Character.player_id.in_(player_ids))
+            .distinct()
+        )
+        session.execute(insert(ChangeLog.__table__).from_select(
+            ['user_id', 'entity', 'entity_id', 'op'], owners_of_players))
+
+
+
+# Columns whose changes can move a game's stats
+_STATS_COLUMNS = {Session: ('date', 'game_id'), Character: ('level', 'is_active', 'game_id')}
+
+
+@event.listens_for(OrmSession, 'after_flush')
+def update_game_stats(session, flush_context):
+    """
+    Keep game_stats in step with the flush: recompute the rows of games whose
+    sessions or characters were added, removed or changed in a way the stats
+    show, and drop the rows of deleted games. New games get their row from
+    NewGame.post, after their characters are inserted.
+    """
+    game_ids = set()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        columns = _STATS_COLUMNS.get(type(obj))
+        if columns is None:
+            continue
+        if obj in session.dirty and not any(get_history(obj, c).has_changes() for c in columns):
+            continue
+        game_ids |= _values(obj, 'game_id')
+    deleted = {obj.id for obj in session.deleted if isinstance(obj, Game)}
+    if deleted:
+        session.execute(GameStats.__table__.delete().where(GameStats.game_id.in_(deleted)))
+    refresh_game_stats(session, game_ids - deleted)
+
+
+def game_stats_upsert(dialect_name, matching):
+    """
+    INSERT ... SELECT ... ON CONFLICT DO UPDATE that recomputes game_stats rows
+    from sessions and characters. `matching(column)` picks the games, given
+    the game id column of each table read.
+    """
+    if dialect_name not in ('sqlite', 'postgresql'):
+        raise NotImplementedError(f'game_stats upserts are not available on {dialect_name}')
+    dialect = sqlite if dialect_name == 'sqlite' else postgresql
+    sessions = (
+        select(Session.game_id, func.count().label('n'), func.max(Session.date).label('last'))
+        .where(matching(Session.game_id))
+        .group_by(Session.game_id)
+        .subquery()
+    )
+    active = Character.is_active.is_(True)
+    characters = (
+        select(Character.game_id, func.count().label('n'),
+               func.count().filter(active).label('active'),
+               func.sum(Character.level).filter(active).label('levels'))
+        .where(matching(Character.game_id))
+        .group_by(Character.game_id)
+        .subquery()
+    )
+    rows = (
+        select(Game.id, func.coalesce(sessions.c.n, 0), sessions.c.last,
+               func.coalesce(characters.c.n, 0), func.coalesce(characters.c.active, 0),
+               func.coalesce(characters.c.levels, 0))
+        .outerjoin(sessions, sessions.c.game_id == Game.id)
+        .outerjoin(characters, characters.c.game_id == Game.id)
+        .where(matching(Game.id))
+    )
+    columns = ['game_id', 'session_count', 'last_session_date', 'character_count',
+               'active_character_count', 'active_level_sum']
+    stmt = dialect.insert(GameStats.__table__).from_select(columns, rows)
+    return stmt.on_conflict_do_update(
+        index_elements=['game_id'], set_={c: stmt.excluded[c] for c in columns[1:]})
+
+
+def refresh_game_stats(session, game_ids):
+    """Recompute the game_stats rows of `game_ids` from their sessions and characters in one upsert."""
+    if not game_ids:
+        return
+    dialect_name = session.get_bind().dialect.name
+    if dialect_name == 'postgresql':
+        # Two transactions would each recompute from their own snapshot, and
+        # the last to commit would drop the other's rows. With the games
+        # locked, the second waits and its upsert sees the first's commit.
+        session.execute(select(Game.id).where(Game.id.in_(game_ids)).order_by(Game.id).with_for_update())
+    session.execute(game_stats_upsert(dialect_name, lambda column: column.in_(game_ids)))
+
+
+def touch_games(session, game_ids):
+    """
+    Record rows added to games with bulk INSERTs, which skip the flush hooks:
+    bump the games' versions, log an upsert of each game for its owner
+    (a game upsert carries its sessions, players and characters) and
+    recompute their stats.
+    """
+    if not game_ids:
+        return
+    owners = session.execute(
+        update(Game).where(Game.id.in_(game_ids)).values(version=Game.version + 1)
+        .returning(Game.id, Game.user_id),
+        execution_options={'synchronize_session': False}).all()
+    session.execute(insert(ChangeLog.__table__), [
+        {'user_id': user_id, 'entity': 'game', 'entity_id': game_id, 'op': 'upsert'}
+        for game_id, user_id in owners
+    ])
+    session.info.setdefault('changed_game_ids', set()).update(game_ids)
+    refresh_game_stats(session, game_ids)
@@ -0,0 +1,84 @@
+import base64
+import json
+from flask import request
+from sqlalchemy import tuple_
+from config import db
+
+# Page size defaults for list endpoints
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+
+def encode_cursor(values):
+    """Pack the sort-key values of the last row into an opaque cursor string."""
+    raw = json.dumps(values, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Unpack a cursor produced by encode_cursor, raising ValueError if it is malformed."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+    if not isinstance(values, list):
+        raise ValueError('Invalid cursor')
+    return values
+
+
+def check_cursor(values, key_columns):
+    """
+    Raise ValueError unless a decoded cursor has one value per sort key
+    column, each of the column's Python type. A cursor from another
+    endpoint or sort order must not reach the database as a bound value.
+    """
+    if len(values) != len(key_columns):
+        raise ValueError('Invalid cursor')
+    for value, column in zip(values, key_columns):
+        expected = column.type.python_type
+        # bool is an int subclass, but true/false is never a valid id or level
+        if not isinstance(value, expected) or (isinstance(value, bool) and expected is not bool):
+            raise ValueError('Invalid cursor')
+
+
+def page_args():
+    """
+    Read `limit` and `cursor` from the query string.
+    Returns (limit, after) where `after` is the decoded cursor or None.
+    """
+    try:
+        limit = int(request.args.get('limit', DEFAULT_LIMIT))
+    except ValueError:
+        raise ValueError('limit must be an integer')
+    if limit < 1:
+        raise ValueError('limit must be positive')
+    limit = min(limit, MAX_LIMIT)
+    cursor = request.args.get('cursor')
+    after = decode_cursor(cursor) if cursor else None
+    return limit, after
+
+
+def paginate(stmt, key_columns, limit, after=None, descending=False):
+    """
+    Apply keyset pagination to a select() of ORM entities.
+    `key_columns` is the sort key, ascending unless `descending`; the last
+    column must be unique (normally the primary key) so the order is stable
+    across pages.
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    if after is not None:
+        check_cursor(after, key_columns)
+        key = key_columns[0] if len(key_columns) == 1 else tuple_(*key_columns)
+        bound = after[0] if len(key_columns) == 1 else tuple_(*after)
+        stmt = stmt.where(key < bound if descending else key > bound)
+    # Fetch one extra row to know whether another page exists
+    order = [col.desc() for col in key_columns] if descending else key_columns
+    stmt = stmt.order_by(*order).limit(limit + 1)
+    rows = db.session.execute(stmt).scalars().all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, col.key) for col in key_columns])
+    return rows, next_cursor
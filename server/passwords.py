@@ -0,0 +1,79 @@
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from time import perf_counter
+import bcrypt as _bcrypt
+from config import app
+from instrumentation import Gauge, Histogram, TIME_BUCKETS, register
+
+
+class PasswordHasherBusy(RuntimeError):
+    """
+    Raised when too many hash/check jobs are already waiting for a worker,
+    or a job did not finish within BCRYPT_TIMEOUT seconds.
+    """
+
+
+_executor = None
+_executor_lock = threading.Lock()
+_pending = 0
+_rejected = 0
+_pending_lock = threading.Lock()
+
+wait_duration = register(Histogram(
+    'bcrypt_duration_seconds', 'Time from submitting a bcrypt job to its result, queueing included.',
+    TIME_BUCKETS, label_names=('operation',)))
+register(Gauge('bcrypt_queue_depth', 'bcrypt jobs submitted and not yet finished.', lambda: _pending))
+register(Gauge('bcrypt_rejected_total', 'bcrypt jobs refused because the queue was full.',
+               lambda: _rejected, kind='counter'))
+
+
+def _get_executor():
+    """Create the worker pool on first use, so each server process gets its own."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=app.config['BCRYPT_WORKERS'])
+        return _executor
+
+
+def _run(operation, fn, *args):
+    """
+    Run a bcrypt function in the worker pool and wait for it. With
+    BCRYPT_WORKERS=0 it runs inline instead (handy for scripts and tests).
+    """
+    global _pending, _rejected
+    if not app.config['BCRYPT_WORKERS']:
+        return fn(*args)
+    with _pending_lock:
+        if _pending >= app.config['BCRYPT_MAX_PENDING']:
+            _rejected += 1
+            raise PasswordHasherBusy('Too many password operations in progress')
+        _pending += 1
+    start = perf_counter()
+    try:
+        future = _get_executor().submit(fn, *args)
+        try:
+            return future.result(timeout=app.config['BCRYPT_TIMEOUT'])
+        except TimeoutError:
+            future.cancel()
+            raise PasswordHasherBusy('Timed out waiting for a password worker')
+    finally:
+        with _pending_lock:
+            _pending -= 1
+        wait_duration.observe((operation,), perf_counter() - start)
+
+
+def hash_password(password):
+    """Hash a password with the configured cost factor (BCRYPT_LOG_ROUNDS)."""
+    salt = _bcrypt.gensalt(rounds=app.config['BCRYPT_LOG_ROUNDS'], prefix=b'2b')
+    return _run('hash', _bcrypt.hashpw, password.encode('utf-8'), salt).decode('utf-8')
+
+
+def check_password(password_hash, password):
+    return _run('check', _bcrypt.checkpw, password.encode('utf-8'), password_hash.encode('utf-8'))
+
+
+def needs_rehash(password_hash):
+    """True when the hash was made with a different cost factor than configured."""
+    rounds = int(password_hash.split('$')[2])
+    return rounds != app.config['BCRYPT_LOG_ROUNDS']
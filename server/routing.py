@@ -0,0 +1,42 @@
+from functools import wraps
+from time import time
+from flask import g, has_app_context, request, session, current_app
+from flask_sqlalchemy.session import Session
+
+REPLICA_BIND = 'replica'
+
+
+class RoutingSession(Session):
+    """
+    db.session class that sends the statements of resource methods marked
+    @read_replica to the 'replica' bind (SQLALCHEMY_BINDS) when one is
+    configured. Flushes and every other request use the primary.
+    """
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and has_app_context() and g.get('read_replica'):
+            replica = self._db.engines.get(REPLICA_BIND)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def read_replica(fn):
+    """
+    Run a read-only resource method against the replica. A client that wrote
+    something in the last DATABASE_REPLICA_STICKY_SECONDS stays on the
+    primary, so it never reads back data older than its own write.
+    """
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        g.read_replica = session.get('primary_until', 0) <= time()
+        return fn(*args, **kwargs)
+    return wrapper
+
+
+def stick_to_primary(response):
+    """after_request hook: pin the client to the primary for a while after a successful write."""
+    window = current_app.config['DATABASE_REPLICA_STICKY_SECONDS']
+    if (window and REPLICA_BIND in current_app.config['SQLALCHEMY_BINDS']
+            and request.method not in ('GET', 'HEAD', 'OPTIONS') and response.status_code < 400):
+        session['primary_until'] = time() + window
+    return response
@@ -1,9 +1,119 @@
 from config import ma, db
-from marshmallow import fields, validate, pre_load
+from marshmallow import fields, validate, pre_load, pre_dump, class_registry
+from sqlalchemy import select, func
+from sqlalchemy.orm import joinedload, selectinload
 from models import User, Game, Player, Session, Character
-from collections import defaultdict
+from instrumentation import serialization_timer
 
-class UserSchema(ma.SQLAlchemySchema):
+
+def parse_expand(value):
+    """
+    Turn an expand string like "games.sessions,players" into a nested dict:
+    {'games': {'sessions': {}}, 'players': {}}. Each path implies its prefixes.
+    """
+    tree = {}
+    for path in (p.strip() for p in (value or '').split(',')):
+        if not path:
+            continue
+        node = tree
+        for part in path.split('.'):
+            node = node.setdefault(part, {})
+    return tree
+
+
+def eager_load(attr, parent=None):
+    """
+    Eager loader for one relationship: selectinload for collections,
+    joinedload for many-to-one. Chains onto `parent` when given.
+    """
+    if attr.property.uselist:
+        return parent.selectinload(attr) if parent is not None else selectinload(attr)
+    return parent.joinedload(attr) if parent is not None else joinedload(attr)
+
+
+class BaseSchema(ma.SQLAlchemySchema):
+    """Base for all schemas; reports dump time to the request instrumentation."""
+
+    def dump(self, obj, *, many=None):
+        with serialization_timer():
+            return super().dump(obj, many=many)
+
+
+class ExpandableSchema:
+    """
+    Mixin for schemas whose relationship fields are opt-in per request.
+
+    `expandable` maps a field name to (ORM attribute path needed to serialize it,
+    nested schema name or None). Fields that are not expanded are excluded from
+    the dump and their relationships are never loaded.
+    """
+    expandable = {}
+    # Used when the request has no ?expand= at all, to keep the full payload
+    default_expand = ''
+
+    @classmethod
+    def validate_expand(cls, tree):
+        for name, subtree in tree.items():
+            if name not in cls.expandable:
+                raise ValueError(f"Cannot expand '{name}' on {cls.__name__}")
+            nested = cls.expandable[name][1]
+            if subtree and not nested:
+                raise ValueError(f"'{name}' on {cls.__name__} has nothing to expand")
+            if nested:
+                class_registry.get_class(nested).validate_expand(subtree)
+
+    @classmethod
+    def excluded_fields(cls, tree, prefix=''):
+        excluded = []
+        for name, (_, nested) in cls.expandable.items():
+            if name not in tree:
+                excluded.append(prefix + name)
+            elif nested:
+                excluded += class_registry.get_class(nested).excluded_fields(
+                    tree[name], f'{prefix}{name}.')
+        return excluded
+
+    @classmethod
+    def loader_options(cls, tree):
+        """
+        Loader options that eager-load exactly the expanded relationships.
+        Everything else keeps the model default (lazy="raise"), so the dump
+        can never trigger a query for a relationship it was not asked for.
+        """
+        options = []
+        for name, (path, nested) in cls.expandable.items():
+            # Fields backed by their own query have no relationship path
+            if name not in tree or not path:
+                continue
+            loader = None
+            for attr in path:
+                loader = eager_load(attr, loader)
+            if nested:
+                inner = class_registry.get_class(nested).loader_options(tree[name])
+                if inner:
+                    loader = loader.options(*inner)
+            options.append(loader)
+        return options
+
+    @classmethod
+    def from_request(cls, args, **kwargs):
+        """
+        Build a schema instance and matching loader options from the query string.
+        ?expand= lists the relationships to include (dotted for nested ones),
+        ?fields= restricts the top-level fields. Raises ValueError on bad input.
+        """
+        tree = parse_expand(args.get('expand', cls.default_expand))
+        cls.validate_expand(tree)
+        only = None
+        if args.get('fields'):
+            only = tuple(f.strip() for f in args['fields'].split(',') if f.strip())
+            top_level = {f.split('.')[0] for f in only}
+            tree = {k: v for k, v in tree.items() if k in top_level}
+        schema = cls(only=only, exclude=cls.excluded_fields(tree), **kwargs)
+        return schema, cls.loader_options(tree)
+
+
+class UserSchema(ExpandableSchema, BaseSchema):
     class Meta:
         model = User
         sqla_session = db.session
@@ -11,23 +121,29 @@ class UserSchema(ma.SQLAlchemySchema):
         include_fk = True
     id = ma.auto_field(dump_only=True)
     username = ma.auto_field(required=True)
-    # Use a method to get unique players across all games
+    # Unique players across all games, and their count, both computed in SQL
     players = fields.Method('get_unique_players', dump_only=True)
-    # Include full game details, with nested players->characters and sessions
-    games = fields.List(fields.Nested('GameSchema'), dump_only=True)
+    player_count = fields.Method('get_player_count', dump_only=True)
+    # Include full game details, with nested players->characters and sessions.
+    # Nested(many=True) dumps all games in one call so GameSchema can batch them.
+    games = fields.Nested('GameSchema', many=True, dump_only=True)
+
+    expandable = {
+        'games': ((User.games,), 'GameSchema'),
+        'players': ((), None),
+        'player_count': ((), None),
+    }
+    default_expand = 'games.sessions,games.players,players'
 
     def get_unique_players(self, obj):
-        seen = set()
-        unique_players = []
-        for game in getattr(obj, 'games', []) or []:
-            for player in getattr(game, 'players', []) or []:
-                if player and player.id not in seen:
-                    seen.add(player.id)
-                    unique_players.append(player)
-        from schemas import PlayerSchema
-        return PlayerSchema(exclude=('characters',), many=True).dump(unique_players)
-
-class GameSchema(ma.SQLAlchemySchema):
+        roster = db.session.execute(Player.roster_for(obj.id).order_by(Player.id))
+        return player_summaries_schema.dump(roster.scalars().all())
+
+    def get_player_count(self, obj):
+        roster = Player.roster_for(obj.id).subquery()
+        return db.session.execute(select(func.count()).select_from(roster)).scalar_one()
+
+class GameSchema(ExpandableSchema, BaseSchema):
     @pre_load
     def fix_empty_date(self, data, **kwargs):
         if data.get("start_date", None) == "":
@@ -50,24 +166,45 @@ class GameSchema(ma.SQLAlchemySchema):
     players = fields.Method('get_game_players', dump_only=True)
     sessions = fields.List(fields.Nested('SessionSchema'), dump_only=True)
 
+    expandable = {
+        'sessions': ((Game.sessions,), None),
+        'players': ((Game.characters, Character.player), None),
+    }
+    default_expand = 'sessions,players'
+
+    @pre_dump(pass_many=True)
+    def group_players(self, data, many, **kwargs):
+        """
+        Group characters by player for every game in the batch in one pass,
+        serializing all characters with a single dump call. get_game_players
+        then only looks up the result, so schema instances that dump games
+        should not be shared between threads.
+        """
+        if 'players' not in self.dump_fields:
+            return data
+        games = data if many else [data]
+        characters = [char for game in games for char in game.characters if char.player]
+        dumped = characters_schema.dump(characters)
+        self._players_by_game = {}
+        entries = {}
+        for char, char_data in zip(characters, dumped):
+            entry = entries.get((char.game_id, char.player_id))
+            if entry is None:
+                player = char.player
+                entry = entries[(char.game_id, char.player_id)] = {
+                    'id': player.id,
+                    'name': player.name,
+                    'summary': player.summary,
+                    'characters': [],
+                }
+                self._players_by_game.setdefault(char.game_id, []).append(entry)
+            entry['characters'].append(char_data)
+        return data
+
     def get_game_players(self, obj):
-        grouped = defaultdict(list)
-        for char in getattr(obj, 'characters', []) or []:
-            if char.player:
-                grouped[char.player].append(char)
-        # Serialize each player's characters
-        from schemas import CharacterSchema
-        return [
-            {
-                'id': player.id,
-                'name': player.name,
-                'summary': player.summary,
-                'characters': CharacterSchema(many=True).dump(chars)
-            }
-            for player, chars in grouped.items()
-        ]
-
-class PlayerSchema(ma.SQLAlchemySchema):
+        return self._players_by_game.get(obj.id, [])
+
+class PlayerSchema(ExpandableSchema, BaseSchema):
     class Meta:
         model = Player
         sqla_session = db.session
@@ -79,7 +216,12 @@ class PlayerSchema(ma.SQLAlchemySchema):
     # Removed games field to prevent recursion
     characters = fields.List(fields.Nested('CharacterSchema'), dump_only=True)
 
-class SessionSchema(ma.SQLAlchemySchema):
+    expandable = {
+        'characters': ((Player.characters,), None),
+    }
+    default_expand = 'characters'
+
+class SessionSchema(BaseSchema):
     class Meta:
         model = Session
         sqla_session = db.session
@@ -90,7 +232,7 @@ class SessionSchema(ma.SQLAlchemySchema):
     summary = ma.auto_field()
     game_id = ma.auto_field()
 
-class CharacterSchema(ma.SQLAlchemySchema):
+class CharacterSchema(BaseSchema):
     class Meta:
         model = Character
         sqla_session = db.session
@@ -103,4 +245,9 @@ class CharacterSchema(ma.SQLAlchemySchema):
     icon = ma.auto_field()
     is_active = ma.auto_field()
     player_id = ma.auto_field()
-    game_id = ma.auto_field()
\ No newline at end of file
+    game_id = ma.auto_field()
+
+
+# Shared instances used inside other schemas' dump paths
+characters_schema = CharacterSchema(many=True)
+player_summaries_schema = PlayerSchema(exclude=('characters',), many=True)
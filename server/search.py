@@ -0,0 +1,164 @@
+import re
+from sqlalchemy import DDL, event, select, text
+from config import db
+from models import Game, Player, Session
+from pagination import encode_cursor
+from schemas import GameSchema, SessionSchema, PlayerSchema
+
+# Indexed text per source table: (source, SQLite FTS5 table, columns)
+SOURCES = (
+    ('sessions', 'sessions_fts', ('summary',)),
+    ('games', 'games_fts', ('description', 'setting')),
+    ('players', 'players_fts', ('summary',)),
+)
+SNIPPET_WORDS = 12
+
+
+def _document(alias, columns):
+    """The text Postgres indexes for a row; queries must use the same expression."""
+    return " || ' ' || ".join(f"coalesce({alias}{c}, '')" for c in columns)
+
+
+def sqlite_ddl(source, fts, columns):
+    """
+    FTS5 table over `source` (external content, so the text is not stored
+    twice) plus triggers that keep it in step with every write.
+    """
+    cols = ', '.join(columns)
+    new = ', '.join(f'new.{c}' for c in columns)
+    old = ', '.join(f'old.{c}' for c in columns)
+    remove = f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old});"
+    add = f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new});"
+    return [
+        f"CREATE VIRTUAL TABLE {fts} USING fts5({cols}, content='{source}', content_rowid='id', "
+        f"tokenize='porter unicode61')",
+        f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {source} BEGIN {add} END",
+        f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {source} BEGIN {remove} END",
+        f"CREATE TRIGGER {fts}_au AFTER UPDATE OF {cols} ON {source} BEGIN {remove} {add} END",
+    ]
+
+
+def postgres_ddl(source, columns):
+    """GIN index over the row's tsvector; Postgres maintains it on every write."""
+    return [
+        f"CREATE INDEX ix_{source}_search ON {source} "
+        f"USING GIN (to_tsvector('english', {_document('', columns)}))"
+    ]
+
+
+# Build the indexes whenever the tables are created with create_all()
+for _source, _fts, _columns in SOURCES:
+    _table = db.metadata.tables[_source]
+    for _statement in sqlite_ddl(_source, _fts, _columns):
+        event.listen(_table, 'after_create', DDL(_statement).execute_if(dialect='sqlite'))
+    event.listen(_table, 'before_drop', DDL(f'DROP TABLE IF EXISTS {_fts}').execute_if(dialect='sqlite'))
+    for _statement in postgres_ddl(_source, _columns):
+        event.listen(_table, 'after_create', DDL(_statement).execute_if(dialect='postgresql'))
+
+
+# One SELECT per source, scoped to the user: sessions and games through the
+# game owner, players through the user's roster. Lower rank is better.
+SQLITE_PARTS = (
+    """
+    SELECT 'session' AS kind, s.id AS id, s.game_id AS game_id, bm25(sessions_fts) AS rank,
+           snippet(sessions_fts, -1, '<mark>', '</mark>', '…', :words) AS snippet
+    FROM sessions_fts JOIN sessions s ON s.id = sessions_fts.rowid
+    JOIN games g ON g.id = s.game_id
+    WHERE sessions_fts MATCH :query AND g.user_id = :user_id""",
+    """
+    SELECT 'game', g.id, g.id, bm25(games_fts),
+           snippet(games_fts, -1, '<mark>', '</mark>', '…', :words)
+    FROM games_fts JOIN games g ON g.id = games_fts.rowid
+    WHERE games_fts MATCH :query AND g.user_id = :user_id""",
+    """
+    SELECT 'player', p.id, NULL, bm25(players_fts),
+           snippet(players_fts, -1, '<mark>', '</mark>', '…', :words)
+    FROM players_fts JOIN players p ON p.id = players_fts.rowid
+    WHERE players_fts MATCH :query AND p.id IN (
+        SELECT c.player_id FROM characters c JOIN games g ON g.id = c.game_id
+        WHERE g.user_id = :user_id)""",
+)
+_session_doc = _document('s.', ('summary',))
+_game_doc = _document('g.', ('description', 'setting'))
+_player_doc = _document('p.', ('summary',))
+_headline = "'StartSel=<mark>, StopSel=</mark>, MaxWords=' || (:words * 2) || ', MinWords=' || :words"
+POSTGRES_PARTS = (
+    f"""
+    SELECT 'session' AS kind, s.id AS id, s.game_id AS game_id,
+           -ts_rank(to_tsvector('english', {_session_doc}), q) AS rank,
+           ts_headline('english', {_session_doc}, q, {_headline}) AS snippet
+    FROM sessions s JOIN games g ON g.id = s.game_id, plainto_tsquery('english', :query) q
+    WHERE to_tsvector('english', {_session_doc}) @@ q AND g.user_id = :user_id""",
+    f"""
+    SELECT 'game', g.id, g.id, -ts_rank(to_tsvector('english', {_game_doc}), q),
+           ts_headline('english', {_game_doc}, q, {_headline})
+    FROM games g, plainto_tsquery('english', :query) q
+    WHERE to_tsvector('english', {_game_doc}) @@ q AND g.user_id = :user_id""",
+    f"""
+    SELECT 'player', p.id, NULL, -ts_rank(to_tsvector('english', {_player_doc}), q),
+           ts_headline('english', {_player_doc}, q, {_headline})
+    FROM players p, plainto_tsquery('english', :query) q
+    WHERE to_tsvector('english', {_player_doc}) @@ q AND p.id IN (
+        SELECT c.player_id FROM characters c JOIN games g ON g.id = c.game_id
+        WHERE g.user_id = :user_id)""",
+)
+
+# How matched rows are loaded and serialized for the response
+_loaders = {
+    'session': (Session, SessionSchema(many=True)),
+    'game': (Game, GameSchema(exclude=('players', 'sessions'), many=True)),
+    'player': (Player, PlayerSchema(exclude=('characters',), many=True)),
+}
+
+
+def parse_query(value):
+    """Words of the search string; punctuation and FTS operators are ignored."""
+    return re.findall(r'\w+', value or '')
+
+
+def search(user_id, words, limit, after=None):
+    """
+    Ranked full-text matches for `words` (all must match) across the user's
+    sessions, games and roster players, keyset-paginated on (rank, kind, id).
+    Returns (results, next_cursor). Each result has type, id, game_id, the
+    row's data and a snippet with matches wrapped in <mark> (the snippet
+    text itself is not HTML-escaped).
+    """
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'sqlite':
+        parts, query = SQLITE_PARTS, ' '.join(f'"{w}"' for w in words)
+    elif dialect == 'postgresql':
+        parts, query = POSTGRES_PARTS, ' '.join(words)
+    else:
+        raise NotImplementedError(f'Search is not available on {dialect}')
+
+    sql = f"SELECT * FROM ({' UNION ALL '.join(parts)}) AS matches"
+    params = {'query': query, 'user_id': user_id, 'words': SNIPPET_WORDS, 'limit': limit + 1}
+    if after is not None:
+        if (len(after) != 3 or not isinstance(after[0], (int, float)) or after[1] not in _loaders
+                or not isinstance(after[2], int) or isinstance(after[2], bool)):
+            raise ValueError('Invalid cursor')
+        sql += " WHERE (rank, kind, id) > (:rank, :kind, :id)"
+        params.update(rank=after[0], kind=after[1], id=after[2])
+    sql += " ORDER BY rank, kind, id LIMIT :limit"
+    rows = db.session.execute(text(sql), params).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor([last.rank, last.kind, last.id])
+
+    # Current data for the matched rows, one query per kind
+    data = {}
+    for kind, (model, schema) in _loaders.items():
+        ids = [row.id for row in rows if row.kind == kind]
+        if ids:
+            loaded = db.session.scalars(select(model).where(model.id.in_(ids))).all()
+            data.update({(kind, obj.id): dumped for obj, dumped in zip(loaded, schema.dump(loaded))})
+    results = [
+        {'type': row.kind, 'id': row.id, 'game_id': row.game_id, 'snippet': row.snippet,
+         'data': data.get((row.kind, row.id))}
+        for row in rows
+    ]
+    return results, next_cursor
@@ -1,113 +1,289 @@
+import argparse
+import csv
+import io
+from datetime import date, timedelta
 from faker import Faker
-from random import randint, choice as rc
-from models import db, User, Game, Player, Session, Character
+from random import Random, randint, choice as rc
+from sqlalchemy import insert, text
+from models import db, User, Game, Player, Session, Character, game_stats_upsert
 from app import app
+from passwords import hash_password
 
-if __name__ == '__main__':
+SYSTEMS = [
+    "D&D 5e", "Pathfinder 2e", "Pathfinder 1e",
+    "Call of Cthulhu 7th Edition", "Shadowrun 6th Edition",
+    "Starfinder", "World of Darkness"
+]
+TITLES = [
+    "Curse of the Crimson Throne", "Rise of the Runelords",
+    "Wrath of the Righteous", "Curse of Strahd",
+    "Tomb of Annihilation", "Lost Mines of Phandelver",
+    "The Haunting of Harrowstone", "Masks of Nyarlathotep",
+    "Edge of the Earth"
+]
+STATUSES = ["planned", "ongoing", "completed"]
+CLASSES = [
+    "Fighter", "Wizard", "Rogue", "Cleric",
+    "Druid", "Paladin", "Ranger", "Bard", "Monk"
+]
+# Seeded dates count back from this day rather than today, so a seed gives
+# the same rows whenever it runs
+SEED_ANCHOR_DATE = date(2025, 1, 1)
+# Tables in foreign-key order, so parents are always written first
+TABLES = (User.__table__, Game.__table__, Player.__table__, Session.__table__, Character.__table__)
+
+
+def seed_sample():
+    """Seed a handful of users with random Faker data for local development."""
+    fake = Faker()
+    print("Creating users...")
+    users = []
+    for _ in range(5):
+        username = fake.user_name()
+        user = User(username=username)
+        user.password_hash = "password123"
+        users.append(user)
+
+    db.session.add_all(users)
+    db.session.commit()
+    print(f"Seeded {len(users)} users!")
+
+    print("Creating games...")
+    games = []
+    for user in users:
+        num_games = randint(1, 3)
+        for _ in range(num_games):
+            title = rc(TITLES)
+            game = Game(
+                title=title,
+                description=fake.text(max_nb_chars=200),
+                system=rc(SYSTEMS),
+                start_date=fake.date_between(start_date="-1y", end_date="today"),
+                setting=fake.sentence(nb_words=5),
+                status=rc(STATUSES),
+                user_id=user.id
+            )
+            games.append(game)
+    db.session.add_all(games)
+    db.session.commit()
+    print(f"Seeded {len(games)} games!")
+
+    print("Creating players...")
+    players = []
+    game_players_map = {}
+    for game in games:
+        num_players = randint(1, 4)
+        for _ in range(num_players):
+            player = Player(
+                name=fake.name(),
+                summary=fake.sentence(nb_words=12)
+            )
+            players.append(player)
+            game_players_map.setdefault(game.id, []).append(player)
+    db.session.add_all(players)
+    db.session.commit()
+    print(f"Seeded {len(players)} players!")
+
+    print("Creating sessions...")
+    sessions = []
+    for game in games:
+        num_sessions = randint(1, 5)
+        for _ in range(num_sessions):
+            # Use the game’s start_date as the earliest, or default to one year ago
+            start = game.start_date or "-1y"
+            session_date = fake.date_between(start_date=start, end_date="today")
+            session_obj = Session(
+                date=session_date,
+                summary=fake.text(max_nb_chars=100),
+                game_id=game.id
+            )
+            sessions.append(session_obj)
+    db.session.add_all(sessions)
+    db.session.commit()
+    print(f"Seeded {len(sessions)} sessions!")
+
+    print("Creating characters...")
+    characters = []
+    for game_id, plist in game_players_map.items():
+        num_chars_total = randint(1, len(plist) * 2)
+        for _ in range(num_chars_total):
+            player = rc(plist)
+            char = Character(
+                name=fake.name(),
+                character_class=rc(CLASSES),
+                level=randint(1, 20),
+                icon=fake.image_url(),
+                is_active=rc([True, False]),
+                player_id=player.id,
+                game_id=game_id
+            )
+            characters.append(char)
+    db.session.add_all(characters)
+    db.session.commit()
+    print(f"Seeded {len(characters)} characters!")
+
+
+class TableWriter:
+    """
+    Buffers generated rows per table and writes them in batches, parents
+    first, so memory stays bounded however large the dataset is. Uses COPY
+    on PostgreSQL (when enabled) and executemany inserts everywhere else.
+    """
+
+    def __init__(self, conn, batch_size, use_copy):
+        self.conn = conn
+        self.batch_size = batch_size
+        self.use_copy = use_copy
+        self.buffers = {table: [] for table in TABLES}
+        self.counts = {table.name: 0 for table in TABLES}
+
+    def add(self, table, row):
+        buffer = self.buffers[table]
+        buffer.append(row)
+        if len(buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        for table in TABLES:
+            rows = self.buffers[table]
+            if not rows:
+                continue
+            if self.use_copy:
+                self._copy(table, rows)
+            else:
+                self.conn.execute(insert(table), rows)
+            self.counts[table.name] += len(rows)
+            rows.clear()
+        self.conn.commit()
+
+    def _copy(self, table, rows):
+        columns = list(rows[0])
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow(['' if row[col] is None else row[col] for col in columns])
+        buffer.seek(0)
+        cursor = self.conn.connection.dbapi_connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+        finally:
+            cursor.close()
+
+
+def seed_at_scale(users, games_per_user, players_per_game=4, characters_per_player=1,
+                  sessions_per_game=10, batch_size=5000, seed=0, use_copy=True):
+    """
+    Stream a large, deterministic dataset into empty tables.
+    The same `seed` always produces the same rows. Every user's password is
+    "password123". Returns the number of rows written per table.
+    """
+    rng = Random(seed)
     fake = Faker()
+    fake.seed_instance(seed)
+    # Faker is slow per call, so draw text from fixed pools instead
+    names = [fake.name() for _ in range(500)]
+    handles = [fake.user_name() for _ in range(500)]
+    sentences = [fake.sentence(nb_words=12) for _ in range(200)]
+    texts = [fake.text(max_nb_chars=200) for _ in range(200)]
+    password = hash_password("password123")
+
+    with db.engine.connect() as conn:
+        use_copy = use_copy and conn.dialect.name == 'postgresql'
+        writer = TableWriter(conn, batch_size, use_copy)
+        game_id = player_id = 0
+        for user_id in range(1, users + 1):
+            writer.add(User.__table__, {
+                'id': user_id,
+                'username': f"{rng.choice(handles)}{user_id}",
+                '_password_hash': password,
+            })
+            for _ in range(games_per_user):
+                game_id += 1
+                start = SEED_ANCHOR_DATE - timedelta(days=rng.randint(30, 5 * 365))
+                writer.add(Game.__table__, {
+                    'id': game_id,
+                    'title': rng.choice(TITLES),
+                    'description': rng.choice(texts),
+                    'system': rng.choice(SYSTEMS),
+                    'start_date': start,
+                    'setting': rng.choice(sentences),
+                    'status': rng.choice(STATUSES),
+                    'user_id': user_id,
+                })
+                for _ in range(sessions_per_game):
+                    writer.add(Session.__table__, {
+                        'date': start + timedelta(days=rng.randint(0, (SEED_ANCHOR_DATE - start).days)),
+                        'summary': rng.choice(texts),
+                        'game_id': game_id,
+                    })
+                for _ in range(players_per_game):
+                    player_id += 1
+                    writer.add(Player.__table__, {
+                        'id': player_id,
+                        'name': rng.choice(names),
+                        'summary': rng.choice(sentences),
+                    })
+                    for _ in range(characters_per_player):
+                        writer.add(Character.__table__, {
+                            'name': rng.choice(names),
+                            'character_class': rng.choice(CLASSES),
+                            'level': rng.randint(1, 20),
+                            'icon': None,
+                            'is_active': rng.random() < 0.7,
+                            'player_id': player_id,
+                            'game_id': game_id,
+                        })
+            if user_id % 1000 == 0:
+                print(f"  ...{user_id} users generated")
+        writer.flush()
+
+        # Core inserts skip the flush hooks that keep game_stats in step
+        for first in range(1, game_id + 1, batch_size):
+            last = first + batch_size - 1
+            conn.execute(game_stats_upsert(conn.dialect.name, lambda column: column.between(first, last)))
+            conn.commit()
+
+        if conn.dialect.name == 'postgresql':
+            # Explicit ids bypass the serial sequences; move them past the new rows
+            for table in ('users', 'games', 'players'):
+                conn.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                    f"COALESCE((SELECT MAX(id) FROM {table}), 1))"))
+            conn.commit()
+    return writer.counts
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Reset the database and seed it. Without --users, seeds a small random sample.")
+    parser.add_argument('--users', type=int, help="generate this many users in large-scale mode")
+    parser.add_argument('--games-per-user', type=int, default=10)
+    parser.add_argument('--players-per-game', type=int, default=4)
+    parser.add_argument('--characters-per-player', type=int, default=1)
+    parser.add_argument('--sessions-per-game', type=int, default=10)
+    parser.add_argument('--batch-size', type=int, default=5000, help="rows buffered per table before writing")
+    parser.add_argument('--seed', type=int, default=0, help="random seed; the same seed gives the same data")
+    parser.add_argument('--no-copy', action='store_true', help="use INSERT instead of COPY on PostgreSQL")
+    args = parser.parse_args()
+
     with app.app_context():
         print("Resetting database schema...")
         db.drop_all()
         db.create_all()
 
-        print("Creating users...")
-        users = []
-        for _ in range(5):
-            username = fake.user_name()
-            user = User(username=username)
-            user.password_hash = "password123"
-            users.append(user)
-
-        db.session.add_all(users)
-        db.session.commit()
-        print(f"Seeded {len(users)} users!")
-
-        print("Creating games...")
-        systems = [
-            "D&D 5e", "Pathfinder 2e", "Pathfinder 1e",
-            "Call of Cthulhu 7th Edition", "Shadowrun 6th Edition",
-            "Starfinder", "World of Darkness"
-        ]
-        titles = [
-            "Curse of the Crimson Throne", "Rise of the Runelords",
-            "Wrath of the Righteous", "Curse of Strahd",
-            "Tomb of Annihilation", "Lost Mines of Phandelver",
-            "The Haunting of Harrowstone", "Masks of Nyarlathotep",
-            "Edge of the Earth"
-        ]
-        statuses = ["planned", "ongoing", "completed"]
-        games = []
-        for user in users:
-            num_games = randint(1, 3)
-            for _ in range(num_games):
-                title = rc(titles)
-                game = Game(
-                    title=title,
-                    description=fake.text(max_nb_chars=200),
-                    system=rc(systems),
-                    start_date=fake.date_between(start_date="-1y", end_date="today"),
-                    setting=fake.sentence(nb_words=5),
-                    status=rc(statuses),
-                    user_id=user.id
-                )
-                games.append(game)
-        db.session.add_all(games)
-        db.session.commit()
-        print(f"Seeded {len(games)} games!")
-
-        print("Creating players...")
-        players = []
-        game_players_map = {}
-        for game in games:
-            num_players = randint(1, 4)
-            for _ in range(num_players):
-                player = Player(
-                    name=fake.name(),
-                    summary=fake.sentence(nb_words=12)
-                )
-                players.append(player)
-                game_players_map.setdefault(game.id, []).append(player)
-        db.session.add_all(players)
-        db.session.commit()
-        print(f"Seeded {len(players)} players!")
-
-        print("Creating sessions...")
-        sessions = []
-        for game in games:
-            num_sessions = randint(1, 5)
-            for _ in range(num_sessions):
-                # Use the game’s start_date as the earliest, or default to one year ago
-                start = game.start_date or "-1y"
-                session_date = fake.date_between(start_date=start, end_date="today")
-                session_obj = Session(
-                    date=session_date,
-                    summary=fake.text(max_nb_chars=100),
-                    game_id=game.id
-                )
-                sessions.append(session_obj)
-        db.session.add_all(sessions)
-        db.session.commit()
-        print(f"Seeded {len(sessions)} sessions!")
-
-        print("Creating characters...")
-        characters = []
-        for game_id, plist in game_players_map.items():
-            num_chars_total = randint(1, len(plist) * 2)
-            for _ in range(num_chars_total):
-                player = rc(plist)
-                char = Character(
-                    name=fake.name(),
-                    character_class=rc([
-                        "Fighter", "Wizard", "Rogue", "Cleric",
-                        "Druid", "Paladin", "Ranger", "Bard", "Monk"
-                    ]),
-                    level=randint(1, 20),
-                    icon=fake.image_url(),
-                    is_active=rc([True, False]),
-                    player_id=player.id,
-                    game_id=game_id
-                )
-                characters.append(char)
-        db.session.add_all(characters)
-        db.session.commit()
-        print(f"Seeded {len(characters)} characters!")
\ No newline at end of file
+        if args.users is None:
+            seed_sample()
+        else:
+            print(f"Generating {args.users} users x {args.games_per_user} games...")
+            counts = seed_at_scale(
+                args.users, args.games_per_user,
+                players_per_game=args.players_per_game,
+                characters_per_player=args.characters_per_player,
+                sessions_per_game=args.sessions_per_game,
+                batch_size=args.batch_size,
+                seed=args.seed,
+                use_copy=not args.no_copy,
+            )
+            for table, count in counts.items():
+                print(f"Seeded {count} {table}!")
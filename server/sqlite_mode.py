@@ -0,0 +1,85 @@
+import sqlite3
+import threading
+from time import perf_counter
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from werkzeug.exceptions import ServiceUnavailable
+from flask import has_request_context, request
+from config import app
+from instrumentation import Gauge, Histogram, TIME_BUCKETS, register
+
+
+class WriterBusy(ServiceUnavailable):
+    """Raised when a write waited SQLITE_WRITE_TIMEOUT seconds for the writer lock."""
+    description = 'The database is busy with other writes; try again shortly.'
+
+
+# SQLite allows one writer at a time. Write transactions in this process take
+# this lock at their first write statement and hold it until commit or
+# rollback, so concurrent requests wait their turn here instead of racing for
+# the database lock and failing with "database is locked".
+_writer_lock = threading.Lock()
+_waiting = 0
+_waiting_lock = threading.Lock()
+
+wait_duration = register(Histogram(
+    'sqlite_writer_wait_seconds', 'Time write transactions waited for the SQLite writer lock.',
+    TIME_BUCKETS, label_names=('endpoint',)))
+register(Gauge('sqlite_writer_queue_depth', 'Write transactions waiting for the SQLite writer lock.',
+               lambda: _waiting))
+
+_READ_PREFIXES = ('SELECT', 'PRAGMA', 'EXPLAIN', 'WITH')
+
+
+@event.listens_for(Engine, 'connect')
+def configure_connection(dbapi_connection, connection_record):
+    """
+    Per-connection settings for SQLite: WAL journaling (readers never block
+    the writer), synchronous=NORMAL (safe with WAL, far fewer fsyncs), a busy
+    timeout for writers in other processes, memory-mapped reads and a larger
+    page cache. With SQLITE_SERIALIZE_WRITES, transactions start with BEGIN
+    IMMEDIATE so a write transaction owns the database from its first write.
+    """
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    config = app.config
+    if config['SQLITE_JOURNAL_MODE']:
+        dbapi_connection.execute(f"PRAGMA journal_mode={config['SQLITE_JOURNAL_MODE']}")
+    if config['SQLITE_SYNCHRONOUS']:
+        dbapi_connection.execute(f"PRAGMA synchronous={config['SQLITE_SYNCHRONOUS']}")
+    dbapi_connection.execute(f"PRAGMA busy_timeout={int(config['SQLITE_BUSY_TIMEOUT_MS'])}")
+    dbapi_connection.execute(f"PRAGMA mmap_size={int(config['SQLITE_MMAP_SIZE'])}")
+    # Negative cache_size is in KiB rather than pages
+    dbapi_connection.execute(f"PRAGMA cache_size=-{int(config['SQLITE_CACHE_SIZE_KB'])}")
+    if config['SQLITE_SERIALIZE_WRITES']:
+        dbapi_connection.isolation_level = 'IMMEDIATE'
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def acquire_writer(conn, cursor, statement, parameters, context, executemany):
+    """Take the writer lock before the first write statement of a transaction."""
+    global _waiting
+    if (conn.dialect.name != 'sqlite' or not app.config['SQLITE_SERIALIZE_WRITES']
+            or conn.info.get('holds_writer')
+            or statement.lstrip()[:7].upper().startswith(_READ_PREFIXES)):
+        return
+    with _waiting_lock:
+        _waiting += 1
+    start = perf_counter()
+    try:
+        acquired = _writer_lock.acquire(timeout=app.config['SQLITE_WRITE_TIMEOUT'])
+    finally:
+        with _waiting_lock:
+            _waiting -= 1
+        endpoint = request.endpoint if has_request_context() else None
+        wait_duration.observe((endpoint or 'none',), perf_counter() - start)
+    if not acquired:
+        raise WriterBusy(retry_after=1)
+    conn.info['holds_writer'] = True
+
+
+@event.listens_for(Engine, 'commit')
+@event.listens_for(Engine, 'rollback')
+def release_writer(conn):
+    if conn.info.pop('holds_writer', False):
+        _writer_lock.release()
@@ -0,0 +1,49 @@
+from sqlalchemy import select
+from config import db
+from models import Game, GameStats
+
+
+def _average(level_sum, count):
+    return round(level_sum / count, 2) if count else None
+
+
+def user_stats(user_id):
+    """
+    Dashboard numbers for each of the user's games and totals across them,
+    read from the precomputed game_stats rows in one query. A game that has
+    never had a session or character may have no row; it counts as empty.
+    """
+    rows = db.session.execute(
+        select(Game.id, Game.title, Game.status, GameStats)
+        .outerjoin(GameStats, GameStats.game_id == Game.id)
+        .where(Game.user_id == user_id)
+        .order_by(Game.id)
+    ).all()
+    games = []
+    totals = {'games': 0, 'sessions': 0, 'last_session_date': None, 'characters': 0,
+              'active_characters': 0, 'active_level_sum': 0}
+    for game_id, title, status, stats in rows:
+        stats = stats or GameStats(session_count=0, character_count=0,
+                                   active_character_count=0, active_level_sum=0)
+        last = stats.last_session_date
+        games.append({
+            'game_id': game_id,
+            'title': title,
+            'status': status,
+            'session_count': stats.session_count,
+            'last_session_date': last.isoformat() if last else None,
+            'character_count': stats.character_count,
+            'active_character_count': stats.active_character_count,
+            'average_level': _average(stats.active_level_sum, stats.active_character_count),
+        })
+        totals['games'] += 1
+        totals['sessions'] += stats.session_count
+        totals['characters'] += stats.character_count
+        totals['active_characters'] += stats.active_character_count
+        totals['active_level_sum'] += stats.active_level_sum
+        if last and (totals['last_session_date'] is None or last > totals['last_session_date']):
+            totals['last_session_date'] = last
+    last = totals.pop('last_session_date')
+    totals['last_session_date'] = last.isoformat() if last else None
+    totals['average_level'] = _average(totals.pop('active_level_sum'), totals['active_characters'])
+    return {'games': games, 'totals': totals}
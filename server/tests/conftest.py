@@ -0,0 +1,81 @@
+"""
+Shared fixtures. Run from the server directory with `python -m pytest`.
+The app runs in testing mode, so every @query_budget is enforced: a request
+that issues more SQL statements than its budget fails the test.
+"""
+import os
+import sys
+import tempfile
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+# Settings are read when config.py is imported. A file-backed database, so
+# the WAL/writer-lock setup in sqlite_mode.py runs as in production.
+os.environ['DATABASE_URI'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'test.db')
+os.environ['BCRYPT_WORKERS'] = '0'
+os.environ['BCRYPT_LOG_ROUNDS'] = '4'
+os.environ['FRAGMENT_CACHE'] = 'memory'
+os.environ.pop('DATABASE_REPLICA_URI', None)
+
+import pytest
+from app import app as flask_app
+from config import db
+import fragment_cache
+from models import User
+from seed import seed_at_scale
+
+PASSWORD = 'password123'
+
+
+@pytest.fixture
+def app(monkeypatch):
+    flask_app.config['TESTING'] = True
+    # Fragments are keyed by game id and version, which repeat across tests
+    monkeypatch.setattr(fragment_cache, 'backend',
+                        fragment_cache.LRUBackend(flask_app.config['FRAGMENT_CACHE_BYTES']))
+    with flask_app.app_context():
+        db.drop_all()
+        db.create_all()
+    yield flask_app
+    with flask_app.app_context():
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    """A client signed up and logged in as a new user with no games."""
+    client = app.test_client()
+    response = client.post('/signup', json={'username': 'dm', 'password': PASSWORD})
+    assert response.status_code == 201
+    return client
+
+
+@pytest.fixture
+def seeded(app):
+    """
+    Two users with three games each (four players, one character per player
+    and five sessions per game). Returns a client logged in as the first.
+    """
+    with app.app_context():
+        seed_at_scale(2, 3, players_per_game=4, sessions_per_game=5)
+        username = db.session.get(User, 1).username
+    client = app.test_client()
+    response = client.post('/login', json={'username': username, 'password': PASSWORD})
+    assert response.status_code == 200
+    return client
+
+
+@pytest.fixture
+def game(client):
+    """A game owned by `client`'s user with one player, one character and one session."""
+    response = client.post('/games', json={
+        'title': 'Curse of Strahd', 'system': 'D&D 5e', 'status': 'ongoing',
+        'assignments': [{'player': {'name': 'Alice'},
+                         'character': {'name': 'Ireena', 'character_class': 'Fighter', 'level': 3}}],
+    })
+    assert response.status_code == 201
+    data = response.get_json()
+    response = client.post(f"/games/{data['id']}/sessions", json={'date': '2024-02-01', 'summary': 'Into the mists'})
+    assert response.status_code == 201
+    data['sessions'] = [response.get_json()]
+    return data
@@ -0,0 +1,65 @@
+import gzip
+import os
+import pytest
+import assets
+
+JSON = {'Accept': 'application/json'}
+
+
+@pytest.fixture
+def build(app, tmp_path, monkeypatch):
+    """A client build directory served from a fresh manifest."""
+    (tmp_path / 'index.html').write_text('<html>v1</html>')
+    scripts = tmp_path / 'static' / 'js'
+    scripts.mkdir(parents=True)
+    (scripts / 'main.1a2b3c4d.js').write_text('console.log(1)')
+    (scripts / 'app.js').write_text('let a = 1;' * 50)
+    (scripts / 'app.js.gz').write_bytes(gzip.compress((scripts / 'app.js').read_bytes()))
+    monkeypatch.setattr(app, 'static_folder', str(tmp_path))
+    monkeypatch.setattr(assets, 'manifest', assets.scan(str(tmp_path)))
+    return tmp_path
+
+
+def rewrite(path, data):
+    """Replace a file the way a rebuild does, with a later mtime than before."""
+    mtime = os.stat(path).st_mtime
+    path.write_bytes(data)
+    os.utime(path, (mtime + 10, mtime + 10))
+
+
+def test_serves_from_the_manifest(app, build):
+    client = app.test_client()
+    response = client.get('/static/js/main.1a2b3c4d.js', headers=JSON)
+    assert response.data == b'console.log(1)'
+    assert response.headers['Cache-Control'] == assets.IMMUTABLE
+    index = client.get('/', headers=JSON)
+    assert index.headers['Cache-Control'] == 'no-cache'
+    assert client.get('/', headers={'If-None-Match': index.headers['ETag']}).status_code == 304
+
+
+def test_rebuilt_file_is_rescanned(app, build):
+    client = app.test_client()
+    before = client.get('/', headers=JSON)
+    rewrite(build / 'index.html', b'<html>version two</html>')
+    after = client.get('/', headers=JSON)
+    assert after.data == b'<html>version two</html>'
+    assert after.content_length == len(after.data)
+    assert after.headers['ETag'] != before.headers['ETag']
+    assert client.get('/', headers={'If-None-Match': before.headers['ETag']}).status_code == 200
+    assert assets.manifest['index.html'].size == len(after.data)
+
+
+def test_precompressed_copy_of_a_rebuilt_file_is_dropped(app, build):
+    client = app.test_client()
+    assert client.get('/static/js/app.js', headers={'Accept-Encoding': 'gzip'}).headers['Content-Encoding'] == 'gzip'
+    rewrite(build / 'static/js/app.js', b'let b = 2;')
+    response = client.get('/static/js/app.js', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+    assert response.data == b'let b = 2;'
+
+
+def test_deleted_file_is_404(app, build):
+    client = app.test_client()
+    os.remove(build / 'static/js/main.1a2b3c4d.js')
+    assert client.get('/static/js/main.1a2b3c4d.js', headers=JSON).status_code == 404
+    assert 'static/js/main.1a2b3c4d.js' not in assets.manifest
@@ -0,0 +1,49 @@
+def test_batch_applies_operations_in_order(client, game):
+    char_id = game['players'][0]['characters'][0]['id']
+    session_id = game['sessions'][0]['id']
+    response = client.post('/batch', json={'operations': [
+        {'method': 'PATCH', 'path': f'/characters/{char_id}', 'body': {'level': 4}},
+        {'method': 'PATCH', 'path': f'/sessions/{session_id}', 'body': {'summary': 'Barovia'}},
+        {'method': 'POST', 'path': f"/games/{game['id']}/sessions", 'body': {'date': '2024-02-08', 'summary': 'Vallaki'}},
+        {'method': 'PATCH', 'path': f"/players/{game['players'][0]['id']}", 'body': {'summary': 'Plays tanks'}},
+    ]})
+    assert response.status_code == 200
+    results = response.get_json()['results']
+    assert [r['status'] for r in results] == [200, 200, 201, 200]
+    assert results[0]['body']['level'] == 4
+    assert results[2]['body']['id'] is not None
+
+    sessions = client.get('/games').get_json()['games'][0]['sessions']
+    assert sorted(s['summary'] for s in sessions) == ['Barovia', 'Vallaki']
+
+
+def test_failed_operations_are_skipped(client, game):
+    char_id = game['players'][0]['characters'][0]['id']
+    response = client.post('/batch', json={'operations': [
+        {'method': 'PATCH', 'path': f'/characters/{char_id}', 'body': {'level': 'high'}},
+        {'method': 'PATCH', 'path': '/characters/999', 'body': {'level': 2}},
+        {'method': 'DELETE', 'path': f'/characters/{char_id}'},
+        {'method': 'PATCH', 'path': f'/characters/{char_id}', 'body': {'name': 'Ireena Kolyana'}},
+    ]})
+    assert [r['status'] for r in response.get_json()['results']] == [400, 404, 400, 200]
+    character = client.get('/games').get_json()['games'][0]['players'][0]['characters'][0]
+    assert (character['name'], character['level']) == ('Ireena Kolyana', 3)
+
+
+def test_other_users_sessions_are_refused(app, game):
+    other = app.test_client()
+    other.post('/signup', json={'username': 'intruder', 'password': 'password123'})
+    response = other.post('/batch', json={'operations': [
+        {'method': 'PATCH', 'path': f"/sessions/{game['sessions'][0]['id']}", 'body': {'summary': 'Mine now'}},
+    ]})
+    assert response.get_json()['results'][0]['status'] == 401
+
+
+def test_rejects_malformed_batches(client):
+    assert client.post('/batch', json={'operations': {}}).status_code == 400
+    for body in ([1], 'x', 3, True):
+        response = client.post('/batch', json=body)
+        assert response.status_code == 400
+        assert response.get_json() == {'errors': {'operations': ['Must be a list of operations.']}}
+    too_many = [{'method': 'PATCH', 'path': '/characters/1', 'body': {}}] * 501
+    assert client.post('/batch', json={'operations': too_many}).status_code == 400
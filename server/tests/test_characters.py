@@ -0,0 +1,72 @@
+import pytest
+
+
+def get(client, **args):
+    response = client.get('/characters', query_string=args, headers={'Accept': 'application/json'})
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def everything(client, **args):
+    """Every page of /characters for these arguments."""
+    characters, cursor = [], None
+    while True:
+        page = get(client, limit=5, **args, **({'cursor': cursor} if cursor else {}))
+        assert ('facets' in page) == (cursor is None)
+        characters += page['characters']
+        cursor = page['next_cursor']
+        if cursor is None:
+            return characters
+
+
+def test_pages_through_the_users_characters(seeded):
+    characters = everything(seeded, sort='id')
+    assert len(characters) == 12
+    assert [c['id'] for c in characters] == sorted(c['id'] for c in characters)
+    assert {c['game_id'] for c in characters} == {1, 2, 3}
+
+
+@pytest.mark.parametrize('sort, key, reverse', [
+    ('name', lambda c: (c['name'], c['id']), False),
+    ('-level', lambda c: (c['level'], c['id']), True),
+    ('character_class', lambda c: (c['character_class'], c['id']), False),
+])
+def test_sorts(seeded, sort, key, reverse):
+    characters = everything(seeded, sort=sort)
+    assert characters == sorted(characters, key=key, reverse=reverse)
+
+
+def test_filters_match_the_full_list(seeded):
+    full = everything(seeded, sort='id')
+    a_class = full[0]['character_class']
+    cases = [
+        ({'character_class': a_class}, lambda c: c['character_class'] == a_class),
+        ({'game_id': '1,3'}, lambda c: c['game_id'] in (1, 3)),
+        ({'player_id': full[0]['player_id']}, lambda c: c['player_id'] == full[0]['player_id']),
+        ({'level_min': 5, 'level_max': 15}, lambda c: 5 <= c['level'] <= 15),
+        ({'is_active': 'true'}, lambda c: c['is_active']),
+        ({'is_active': 'false', 'game_id': '2'}, lambda c: not c['is_active'] and c['game_id'] == 2),
+    ]
+    for args, keep in cases:
+        assert everything(seeded, sort='id', **args) == [c for c in full if keep(c)], args
+
+
+def test_facets_ignore_their_own_filter(seeded):
+    full = everything(seeded, sort='id')
+    a_class = full[0]['character_class']
+    facets = get(seeded, character_class=a_class)['facets']
+    # Other classes are still counted, so the client can offer them
+    classes = {f['character_class']: f['count'] for f in facets['character_class']}
+    assert sum(classes.values()) == 12
+    assert classes[a_class] == sum(c['character_class'] == a_class for c in full)
+    # Game counts only cover the selected class
+    assert sum(f['count'] for f in facets['game']) == classes[a_class]
+
+
+@pytest.mark.parametrize('args', [
+    {'level_min': 'high'}, {'game_id': '1,x'}, {'is_active': 'maybe'}, {'sort': 'age'}, {'cursor': 'nonsense'},
+    {'sort': '--name'}, {'sort': '---level'}, {'sort': '-'},
+])
+def test_bad_arguments(seeded, args):
+    response = seeded.get('/characters', query_string=args, headers={'Accept': 'application/json'})
+    assert response.status_code == 400
@@ -0,0 +1,44 @@
+import pytest
+
+
+def revalidate(client, path):
+    etag = client.get(path).headers['ETag']
+    assert etag.startswith('W/')
+    return client.get(path, headers={'If-None-Match': etag})
+
+
+@pytest.mark.parametrize('path', ['/games', '/check_session'])
+def test_unchanged_data_is_304(client, game, path):
+    response = revalidate(client, path)
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.headers['Cache-Control'] == 'private, no-cache'
+
+
+@pytest.mark.parametrize('change', [
+    lambda client, game: client.patch(f"/games/{game['id']}", json={'title': 'Death House'}),
+    lambda client, game: client.post(f"/games/{game['id']}/sessions", json={'date': '2024-03-01', 'summary': 'x'}),
+    lambda client, game: client.patch(f"/characters/{game['players'][0]['characters'][0]['id']}", json={'level': 9}),
+    lambda client, game: client.patch(f"/players/{game['players'][0]['id']}", json={'name': 'Alicia'}),
+    lambda client, game: client.delete(f"/sessions/{game['sessions'][0]['id']}"),
+    lambda client, game: client.post('/games', json={'title': 'New', 'system': 'x', 'status': 'planned'}),
+    lambda client, game: client.delete(f"/games/{game['id']}"),
+])
+def test_every_change_moves_the_etag(client, game, change):
+    before = client.get('/games').headers['ETag']
+    assert change(client, game).status_code < 300
+    response = client.get('/games', headers={'If-None-Match': before})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != before
+
+
+def test_query_string_is_part_of_the_etag(client, game):
+    etag = client.get('/games').headers['ETag']
+    assert client.get('/games?fields=id,title', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_users_never_share_etags(app, client, game):
+    other = app.test_client()
+    other.post('/signup', json={'username': 'other', 'password': 'password123'})
+    etag = client.get('/games').headers['ETag']
+    assert other.get('/games', headers={'If-None-Match': etag}).status_code == 200
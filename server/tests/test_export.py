@@ -0,0 +1,47 @@
+import gzip
+import json
+import export
+from export import EXPORT_FORMAT
+
+
+def lines(response):
+    data = gzip.decompress(response.data) if response.headers.get('Content-Encoding') == 'gzip' else response.data
+    return [json.loads(line) for line in data.splitlines()]
+
+
+def test_header_then_sections_in_order(client, game):
+    response = client.get('/export', headers={'Accept-Encoding': 'identity'})
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert 'Content-Encoding' not in response.headers
+    header, *rows = lines(response)
+    assert header['type'] == 'export'
+    assert header['format'] == EXPORT_FORMAT
+    assert header['username'] == 'dm'
+    assert [row['type'] for row in rows] == ['game', 'session', 'player', 'character']
+    assert rows[0]['title'] == 'Curse of Strahd'
+    assert 'sessions' not in rows[0] and 'players' not in rows[0]
+    assert rows[3]['name'] == 'Ireena'
+
+
+def test_gzipped_on_the_fly(client, game):
+    response = client.get('/export', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.vary
+    plain = lines(client.get('/export', headers={'Accept-Encoding': 'identity'}))
+    assert lines(response)[1:] == plain[1:]
+
+
+def test_only_the_users_own_rows(seeded, monkeypatch):
+    # Several small batches, so rows come from more than one partition
+    monkeypatch.setattr(export, 'EXPORT_BATCH', 4)
+    rows = lines(seeded.get('/export', headers={'Accept-Encoding': 'identity'}))[1:]
+    counts = {}
+    for row in rows:
+        counts[row['type']] = counts.get(row['type'], 0) + 1
+    assert counts == {'game': 3, 'session': 15, 'player': 12, 'character': 12}
+    assert {row['game_id'] for row in rows if row['type'] == 'session'} == {1, 2, 3}
+
+
+def test_requires_login(app):
+    assert app.test_client().get('/export').status_code == 401
@@ -0,0 +1,50 @@
+import fragment_cache
+
+
+def cached_ids(game_ids):
+    return {key[0] for key in fragment_cache.backend._entries} & set(game_ids)
+
+
+def new_game(client, title, player_id=None):
+    assignments = []
+    if player_id:
+        assignments = [{'player_id': player_id,
+                        'character': {'name': f'{title} hero', 'character_class': 'Wizard', 'level': 1}}]
+    response = client.post('/games', json={'title': title, 'system': 'x', 'status': 'planned',
+                                           'assignments': assignments})
+    return response.get_json()
+
+
+def test_second_read_is_served_from_the_cache(client, game):
+    first = client.get('/games').data
+    hits = fragment_cache._stats['hits']
+    assert client.get('/games').data == first
+    assert fragment_cache._stats['hits'] == hits + 1
+
+
+def test_changes_invalidate_only_their_game(client, game):
+    other = new_game(client, 'Other')
+    client.get('/games')
+    assert cached_ids([game['id'], other['id']]) == {game['id'], other['id']}
+
+    client.patch(f"/sessions/{game['sessions'][0]['id']}", json={'summary': 'Ravenloft'})
+    assert cached_ids([game['id'], other['id']]) == {other['id']}
+    games = {g['id']: g for g in client.get('/games').get_json()['games']}
+    assert games[game['id']]['sessions'][0]['summary'] == 'Ravenloft'
+
+
+def test_player_changes_reach_every_game_they_play_in(client, game):
+    player_id = game['players'][0]['id']
+    second = new_game(client, 'Second', player_id)
+    client.get('/games')
+    client.patch(f'/players/{player_id}', json={'name': 'Alicia'})
+    for g in client.get('/games').get_json()['games']:
+        assert [p['name'] for p in g['players']] == ['Alicia'], g['id']
+    assert second['id'] in cached_ids([second['id']])
+
+
+def test_field_selections_are_cached_separately(client, game):
+    full = client.get('/games').get_json()['games'][0]
+    slim = client.get('/games?fields=id,title').get_json()['games'][0]
+    assert 'sessions' in full
+    assert set(slim) == {'id', 'title'}
@@ -0,0 +1,46 @@
+GAME = {'title': 'Lost Mine of Phandelver', 'system': 'D&D 5e', 'status': 'ongoing'}
+
+
+def test_new_players_match_their_assignments(client):
+    # Identical new players must still each get the character assigned to them
+    assignments = [
+        {'player': {'name': 'Alice'}, 'character': {'name': f'Hero {i}', 'character_class': 'Bard', 'level': i}}
+        for i in range(1, 3)
+    ]
+    response = client.post('/games', json=dict(GAME, assignments=assignments))
+    assert response.status_code == 201
+    players = response.get_json()['players']
+    assert [p['characters'][0]['name'] for p in sorted(players, key=lambda p: p['id'])] == \
+        ['Hero 1', 'Hero 2']
+
+
+def test_existing_and_new_players(client):
+    solo = client.post('/players', json={'name': 'Solo'}).get_json()
+    response = client.post('/games', json=dict(GAME, assignments=[
+        {'player_id': solo['id'], 'character': {'name': 'Sildar', 'character_class': 'Fighter', 'level': 2}},
+        {'player': {'name': 'Bea'}, 'character': {'name': 'Gundren', 'character_class': 'Cleric', 'level': 1}},
+    ]))
+    assert response.status_code == 201
+    by_name = {p['name']: [c['name'] for c in p['characters']] for p in response.get_json()['players']}
+    assert by_name == {'Solo': ['Sildar'], 'Bea': ['Gundren']}
+
+
+def test_many_new_players_are_paired_by_content(client):
+    players = [{'name': 'Dee'}, {'name': 'Alice', 'summary': 'DMs too'}, {'name': 'Bea'},
+               {'name': 'Alice'}, {'name': 'Cal'}]
+    response = client.post('/games', json=dict(GAME, assignments=[
+        {'player': player, 'character': {'name': f'Hero {i}', 'character_class': 'Bard', 'level': 1}}
+        for i, player in enumerate(players)
+    ]))
+    assert response.status_code == 201
+    got = {c['name']: (p['name'], p['summary']) for p in response.get_json()['players'] for c in p['characters']}
+    assert got == {f'Hero {i}': (p['name'], p.get('summary')) for i, p in enumerate(players)}
+
+
+def test_invalid_assignment_writes_nothing(client):
+    response = client.post('/games', json=dict(GAME, assignments=[
+        {'player': {'name': 'Cal'}, 'character': {'name': 'No class'}},
+    ]))
+    assert response.status_code == 400
+    assert 'character' in response.get_json()['errors']['assignments']['0']
+    assert client.get('/games').get_json()['games'] == []
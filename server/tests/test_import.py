@@ -0,0 +1,76 @@
+import gzip
+import json
+from sqlalchemy import select, func, text
+from config import db
+from models import Player, Session
+
+
+def ndjson(*rows):
+    return b''.join(json.dumps(row).encode() + b'\n' for row in rows)
+
+
+def post(client, body, **kwargs):
+    response = client.post('/import', data=body, **kwargs)
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def count(app, model):
+    with app.app_context():
+        return db.session.scalar(select(func.count()).select_from(model))
+
+
+def test_ndjson_with_row_errors(app, client, game):
+    report = post(client, ndjson(
+        {'type': 'session', 'game_id': game['id'], 'date': '2024-03-01', 'summary': 'Death House'},
+        {'type': 'character', 'game_id': game['id'], 'player': 'Alice',
+         'name': 'Ismark', 'character_class': 'Fighter', 'level': 2},
+        {'type': 'character', 'game_id': game['id'], 'player': 'Bob',
+         'name': 'Rahadin', 'character_class': 'Rogue', 'level': 5},
+        {'type': 'session', 'game_id': game['id']},
+        {'type': 'monster', 'game_id': game['id']},
+    ) + b'not json\n', content_type='application/x-ndjson')
+    assert report['imported'] == {'sessions': 1, 'characters': 2, 'players': 1}
+    assert [error['line'] for error in report['errors']] == [4, 5, 6]
+    assert report['errors'][0]['errors'] == {'date': ['Missing data for required field.']}
+    # Alice was already on the roster; only Bob is new
+    players, = [g['players'] for g in client.get('/games').get_json()['games'] if g['id'] == game['id']]
+    assert sorted(player['name'] for player in players) == ['Alice', 'Bob']
+
+
+def test_csv_into_one_game(app, client, game):
+    body = b'date,summary\n2024-03-01,Death House\n2024-03-08,\n'
+    report = post(client, body, content_type='text/csv',
+                  query_string={'type': 'session', 'game_id': game['id']})
+    assert report == {'imported': {'sessions': 2, 'characters': 0, 'players': 0}, 'error_count': 0, 'errors': []}
+    assert count(app, Session) == 3
+
+
+def test_gzipped_body(client, game):
+    body = gzip.compress(ndjson({'type': 'session', 'game_id': game['id'], 'date': '2024-03-01'}))
+    report = post(client, body, headers={'Content-Encoding': 'gzip'})
+    assert report['imported']['sessions'] == 1
+
+
+def test_other_users_games_are_rejected(app, seeded):
+    # Game 4 belongs to the second seeded user
+    report = post(seeded, ndjson({'type': 'session', 'game_id': 4, 'date': '2024-03-01'}))
+    assert report['imported']['sessions'] == 0
+    assert report['errors'] == [{'line': 1, 'errors': {'game_id': ['Game not found.']}}]
+
+
+def test_database_error_creating_players_fails_the_chunk(app, client, game):
+    with app.app_context():
+        db.session.execute(text(
+            "CREATE TRIGGER no_players BEFORE INSERT ON players BEGIN SELECT RAISE(ABORT, 'no players'); END"))
+        db.session.commit()
+    players, sessions = count(app, Player), count(app, Session)
+    report = post(client, ndjson(
+        {'type': 'session', 'game_id': game['id'], 'date': '2024-03-01'},
+        {'type': 'character', 'game_id': game['id'], 'player': 'Bob',
+         'name': 'Rahadin', 'character_class': 'Rogue', 'level': 5},
+    ))
+    assert report['imported'] == {'sessions': 0, 'characters': 0, 'players': 0}
+    assert [error['line'] for error in report['errors']] == [1, 2]
+    assert 'no players' in report['errors'][0]['errors']['_chunk'][0]
+    assert (count(app, Player), count(app, Session)) == (players, sessions)
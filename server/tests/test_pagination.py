@@ -0,0 +1,34 @@
+import pytest
+from pagination import encode_cursor
+
+
+@pytest.mark.parametrize('path, values', [
+    ('/games', ['a']),
+    ('/games', [1.5]),
+    ('/games', [True]),
+    ('/games', [None]),
+    ('/games', [1, 2]),
+    ('/players', [{'id': 1}]),
+    ('/characters?sort=id', ['Ireena', 1]),
+    ('/characters?sort=name', [1, 1]),
+    ('/characters?sort=-level', ['Ireena', 1]),
+])
+def test_mistyped_cursor_is_400(seeded, path, values):
+    separator = '&' if '?' in path else '?'
+    response = seeded.get(f'{path}{separator}cursor={encode_cursor(values)}',
+                          headers={'Accept': 'application/json'})
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Invalid cursor'}
+
+
+def test_cursor_from_another_sort_is_400(seeded):
+    by_name = seeded.get('/characters?sort=name&limit=2', headers={'Accept': 'application/json'}).get_json()
+    response = seeded.get(f"/characters?sort=level&cursor={by_name['next_cursor']}",
+                          headers={'Accept': 'application/json'})
+    assert response.status_code == 400
+
+
+def test_valid_cursor_pages(seeded):
+    first = seeded.get('/games?limit=2').get_json()
+    second = seeded.get(f"/games?limit=2&cursor={first['next_cursor']}").get_json()
+    assert [g['id'] for g in first['games'] + second['games']] == [1, 2, 3]
@@ -0,0 +1,31 @@
+from concurrent.futures import Future, TimeoutError
+import passwords
+from models import User
+
+
+class StuckFuture(Future):
+    def result(self, timeout=None):
+        raise TimeoutError()
+
+
+class StuckExecutor:
+    """A worker pool whose jobs never finish."""
+
+    def submit(self, fn, *args):
+        return StuckFuture()
+
+
+def test_slow_hash_pool_returns_503(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'BCRYPT_WORKERS', 1)
+    monkeypatch.setattr(passwords, '_get_executor', StuckExecutor)
+    response = app.test_client().post('/signup', json={'username': 'dm', 'password': 'password123'})
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+    assert passwords._pending == 0
+
+
+def test_rehash_on_login(app, client, monkeypatch):
+    monkeypatch.setitem(app.config, 'BCRYPT_LOG_ROUNDS', 5)
+    assert client.post('/login', json={'username': 'dm', 'password': 'password123'}).status_code == 200
+    with app.app_context():
+        assert not User.query.filter_by(username='dm').one().password_needs_rehash()
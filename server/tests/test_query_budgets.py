@@ -0,0 +1,79 @@
+"""
+Every budgeted endpoint, called the way the client calls it. In testing
+mode instrumentation.record_request_metrics raises when a request issues
+more statements than its @query_budget, so these fail on a regression.
+"""
+import pytest
+from flask import Response, g
+from instrumentation import record_request_metrics
+
+GAME = {'title': 'Tomb of Annihilation', 'system': 'D&D 5e', 'status': 'planned'}
+
+
+def test_budget_is_enforced(app):
+    with app.test_request_context('/games'):
+        g.query_budget, g.query_count = 2, 3
+        with pytest.raises(AssertionError, match='issued 3 queries, budget is 2'):
+            record_request_metrics(Response())
+
+
+@pytest.mark.parametrize('path', [
+    '/check_session', '/check_session?expand=players,player_count',
+    '/games', '/games?limit=2', '/games?expand=sessions', '/games?fields=id,title',
+    '/players', '/players?limit=3&expand=',
+])
+def test_reads(seeded, path):
+    assert seeded.get(path).status_code == 200
+
+
+def test_paging_reads(seeded):
+    first = seeded.get('/games?limit=2').get_json()
+    assert seeded.get(f"/games?limit=2&cursor={first['next_cursor']}").status_code == 200
+    first = seeded.get('/players?limit=2').get_json()
+    assert seeded.get(f"/players?limit=2&cursor={first['next_cursor']}").status_code == 200
+
+
+def test_login(seeded):
+    username = seeded.get('/check_session').get_json()['username']
+    assert seeded.post('/login', json={'username': username, 'password': 'password123'}).status_code == 200
+
+
+def test_game_writes(seeded):
+    created = seeded.post('/games', json=dict(GAME, assignments=[
+        {'player_id': 1, 'character': {'name': 'Artus', 'character_class': 'Fighter', 'level': 5}},
+        {'player': {'name': 'Bea'}, 'character': {'name': 'Dragonbait', 'character_class': 'Paladin', 'level': 5}},
+        {'player': {'name': 'Cal', 'summary': 'New to 5e'},
+         'character': {'name': 'Volo', 'character_class': 'Bard', 'level': 1, 'icon': 'volo.png'}},
+        {'player': {'name': 'Dee'}, 'character': {'name': 'Syndra', 'character_class': 'Wizard', 'level': 9}},
+        {'player': {'name': 'Bea'}, 'character': {'name': 'Azaka', 'character_class': 'Ranger', 'level': 4,
+                                                  'is_active': False}},
+    ]))
+    assert created.status_code == 201
+    game_id = created.get_json()['id']
+    assert seeded.patch(f'/games/{game_id}', json={'status': 'ongoing'}).status_code == 200
+    assert seeded.delete(f'/games/{game_id}').status_code == 204
+
+
+def test_session_writes(seeded):
+    created = seeded.post('/games/1/sessions', json={'date': '2024-03-01', 'summary': 'Port Nyanzaru'})
+    assert created.status_code == 201
+    session_id = created.get_json()['id']
+    assert seeded.patch(f'/sessions/{session_id}', json={'summary': 'Into the jungle'}).status_code == 200
+    assert seeded.delete(f'/sessions/{session_id}').status_code == 204
+
+
+def test_player_and_character_writes(seeded):
+    created = seeded.post('/players', json={'name': 'Solo'})
+    assert created.status_code == 201
+    player_id = created.get_json()['id']
+    assert seeded.patch(f'/players/{player_id}', json={'summary': 'Plays rogues'}).status_code == 200
+    char = seeded.post(f'/players/{player_id}/characters',
+                       json={'name': 'Nix', 'character_class': 'Rogue', 'level': 2, 'game_id': 1})
+    assert char.status_code == 201
+    char_id = char.get_json()['id']
+    assert seeded.patch(f'/characters/{char_id}', json={'level': 3, 'is_active': False}).status_code == 200
+    assert seeded.delete(f'/characters/{char_id}').status_code == 204
+    assert seeded.delete(f'/players/{player_id}').status_code == 204
+    both = seeded.post('/games/1/players',
+                       json={'name': 'Duo', 'character': {'name': 'Kas', 'character_class': 'Monk', 'level': 1}})
+    assert both.status_code == 201
@@ -0,0 +1,75 @@
+import pytest
+from pagination import encode_cursor
+
+
+@pytest.fixture
+def library(client, game):
+    """`game` plus a described game, more sessions and a player summary that mention vampires."""
+    response = client.post('/games', json={
+        'title': 'Ravenloft', 'system': 'D&D 5e', 'status': 'planned',
+        'description': 'A gothic vampire hunt', 'setting': 'Barovia'})
+    assert response.status_code == 201
+    for day in range(1, 4):
+        response = client.post(f"/games/{game['id']}/sessions",
+                               json={'date': f'2024-03-0{day}', 'summary': f'Vampire spawn attack, night {day}'})
+        assert response.status_code == 201
+    player = game['players'][0]
+    assert client.patch(f"/players/{player['id']}", json={'summary': 'Hates vampires'}).status_code == 200
+    return game
+
+
+def search(client, q, **args):
+    response = client.get('/search', query_string={'q': q, **args})
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_matches_across_sources(client, library):
+    results = search(client, 'vampire')['results']
+    assert sorted(r['type'] for r in results) == ['game', 'player', 'session', 'session', 'session']
+    assert all('<mark>' in r['snippet'] for r in results)
+    session = next(r for r in results if r['type'] == 'session')
+    assert session['game_id'] == library['id']
+    assert session['data']['summary'].startswith('Vampire spawn')
+
+
+def test_every_word_must_match(client, library):
+    results = search(client, 'vampire night 2')['results']
+    assert [r['data']['summary'] for r in results] == ['Vampire spawn attack, night 2']
+
+
+def test_index_follows_writes(client, library):
+    session = next(r for r in search(client, 'spawn')['results'] if 'night 1' in r['data']['summary'])
+    assert client.patch(f"/sessions/{session['id']}", json={'summary': 'A quiet rest'}).status_code == 200
+    assert len(search(client, 'spawn')['results']) == 2
+    assert [r['id'] for r in search(client, 'quiet')['results']] == [session['id']]
+    assert client.delete(f"/sessions/{session['id']}").status_code in (200, 204)
+    assert search(client, 'quiet')['results'] == []
+
+
+def test_pages_with_a_cursor(client, library):
+    everything = search(client, 'vampire')['results']
+    seen, cursor = [], None
+    while True:
+        page = search(client, 'vampire', limit=2, **({'cursor': cursor} if cursor else {}))
+        seen += page['results']
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+    assert [(r['type'], r['id']) for r in seen] == [(r['type'], r['id']) for r in everything]
+
+
+def test_scoped_to_the_user(app, client, library):
+    other = app.test_client()
+    other.post('/signup', json={'username': 'player2', 'password': 'password123'})
+    assert search(other, 'vampire')['results'] == []
+
+
+@pytest.mark.parametrize('args', [
+    {}, {'q': '!!!'}, {'q': 'vampire', 'cursor': 'nonsense'},
+    {'q': 'vampire', 'cursor': encode_cursor([-1.0, 7, 1])},
+    {'q': 'vampire', 'cursor': encode_cursor([-1.0, 'session', 'x'])},
+    {'q': 'vampire', 'cursor': encode_cursor(['low', 'session', 1])},
+])
+def test_bad_requests(client, args):
+    assert client.get('/search', query_string=args).status_code == 400
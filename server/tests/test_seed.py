@@ -0,0 +1,27 @@
+from datetime import date
+from sqlalchemy import select
+import seed
+from config import db
+from models import Game, Session
+
+
+class LaterDate(date):
+    @classmethod
+    def today(cls):
+        return cls(2031, 6, 15)
+
+
+def seeded_dates(app):
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        seed.seed_at_scale(2, 2, players_per_game=1, sessions_per_game=3)
+        return (db.session.execute(select(Game.id, Game.start_date).order_by(Game.id)).all(),
+                db.session.execute(select(Session.id, Session.date).order_by(Session.id)).all())
+
+
+def test_same_seed_same_dates_on_any_day(app, monkeypatch):
+    first = seeded_dates(app)
+    monkeypatch.setattr(seed, 'date', LaterDate)
+    assert seeded_dates(app) == first
+    assert all(day <= seed.SEED_ANCHOR_DATE for _, day in first[0] + first[1])
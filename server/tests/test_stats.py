@@ -0,0 +1,76 @@
+import pytest
+from sqlalchemy import select, func
+from config import db
+from models import GameStats, game_stats_upsert
+from seed import seed_at_scale
+
+
+def expected(client):
+    """The /stats numbers for each game, computed from GET /games."""
+    numbers = {}
+    for game in client.get('/games').get_json()['games']:
+        characters = [c for p in game['players'] for c in p['characters'] if c['game_id'] == game['id']]
+        active = [c['level'] for c in characters if c['is_active']]
+        dates = [s['date'] for s in game['sessions']]
+        numbers[game['id']] = {
+            'session_count': len(dates),
+            'last_session_date': max(dates, default=None),
+            'character_count': len(characters),
+            'active_character_count': len(active),
+            'average_level': round(sum(active) / len(active), 2) if active else None,
+        }
+    return numbers
+
+
+def stats(client):
+    response = client.get('/stats')
+    assert response.status_code == 200
+    data = response.get_json()
+    return {g.pop('game_id'): {k: v for k, v in g.items() if k not in ('title', 'status')}
+            for g in data['games']}, data['totals']
+
+
+def test_seeded_games_have_stats(app, seeded):
+    with app.app_context():
+        assert db.session.scalar(select(func.count()).select_from(GameStats)) == 6
+    games, totals = stats(seeded)
+    assert games == expected(seeded)
+    assert totals['games'] == 3
+    assert totals['sessions'] == 15
+    assert totals['characters'] == 12
+
+
+def test_seeding_backfills_in_batches(app):
+    with app.app_context():
+        seed_at_scale(1, 5, players_per_game=1, sessions_per_game=2, batch_size=2)
+        rows = db.session.execute(select(GameStats.game_id, GameStats.session_count).order_by(GameStats.game_id))
+        assert rows.all() == [(game_id, 2) for game_id in range(1, 6)]
+
+
+def test_follows_every_change(client, game):
+    character = game['players'][0]['characters'][0]
+    changes = [
+        lambda: client.post(f"/games/{game['id']}/sessions", json={'date': '2024-05-01', 'summary': 'x'}),
+        lambda: client.patch(f"/characters/{character['id']}", json={'level': 9}),
+        lambda: client.post(f"/games/{game['id']}/players", json={
+            'name': 'Bob', 'character': {'name': 'Rahadin', 'character_class': 'Rogue', 'level': 5}}),
+        lambda: client.patch(f"/characters/{character['id']}", json={'is_active': False}),
+        lambda: client.delete(f"/sessions/{game['sessions'][0]['id']}"),
+        lambda: client.post('/games', json={'title': 'Empty', 'system': 'x', 'status': 'planned'}),
+    ]
+    for change in changes:
+        assert change().status_code < 300
+        games, _ = stats(client)
+        assert games == expected(client)
+
+
+def test_unchanged_stats_are_304(client, game):
+    etag = client.get('/stats').headers['ETag']
+    assert client.get('/stats', headers={'If-None-Match': etag}).status_code == 304
+    client.patch(f"/characters/{game['players'][0]['characters'][0]['id']}", json={'level': 9})
+    assert client.get('/stats', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_unsupported_dialect():
+    with pytest.raises(NotImplementedError, match='not available on mysql'):
+        game_stats_upsert('mysql', lambda column: column.in_([1]))
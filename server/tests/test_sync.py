@@ -0,0 +1,115 @@
+from datetime import datetime, timedelta
+from sqlalchemy import select, func
+import changelog
+import models
+from config import db
+from models import ChangeLog
+from pagination import encode_cursor
+
+
+def cursor(client):
+    response = client.get('/sync')
+    assert response.status_code == 200
+    assert response.get_json()['changes'] == []
+    return response.get_json()['cursor']
+
+
+def sync(client, since):
+    response = client.get('/sync', query_string={'since': since})
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def log_size(app):
+    with app.app_context():
+        return db.session.scalar(select(func.count()).select_from(ChangeLog))
+
+
+def test_changes_after_the_cursor(client, game):
+    since = cursor(client)
+    player = game['players'][0]
+    client.patch(f"/games/{game['id']}", json={'title': 'Death House'})
+    client.patch(f"/games/{game['id']}", json={'title': 'Castle Ravenloft'})
+    client.patch(f"/characters/{player['characters'][0]['id']}", json={'level': 4})
+    client.patch(f"/players/{player['id']}", json={'name': 'Alicia'})
+    session = client.post(f"/games/{game['id']}/sessions", json={'date': '2024-03-01', 'summary': 'Death House'})
+    client.delete(f"/sessions/{game['sessions'][0]['id']}")
+
+    data = sync(client, since)
+    changes = {(c['entity'], c['id']): c for c in data['changes']}
+    assert changes['game', game['id']]['data']['title'] == 'Castle Ravenloft'
+    assert changes['character', player['characters'][0]['id']]['data']['level'] == 4
+    assert changes['player', player['id']]['data']['name'] == 'Alicia'
+    assert changes['session', game['sessions'][0]['id']] == {
+        'entity': 'session', 'id': game['sessions'][0]['id'], 'op': 'delete'}
+    assert changes['session', session.get_json()['id']]['data']['summary'] == 'Death House'
+    assert data['has_more'] is False
+    assert sync(client, data['cursor'])['changes'] == []
+
+
+def test_pages_while_has_more(client, game, monkeypatch):
+    monkeypatch.setattr(changelog, 'SYNC_LIMIT', 2)
+    since = cursor(client)
+    for title in ('One', 'Two', 'Three'):
+        client.patch(f"/games/{game['id']}", json={'title': title})
+    first = sync(client, since)
+    assert first['has_more'] is True
+    second = sync(client, first['cursor'])
+    assert second['has_more'] is False
+    assert second['changes'][0]['data']['title'] == 'Three'
+
+
+def test_bad_and_expired_cursors(client, app):
+    assert client.get('/sync?since=nonsense').status_code == 400
+    expired = encode_cursor([0, 0])
+    assert client.get('/sync', query_string={'since': expired}).status_code == 410
+
+
+def test_sync_never_compacts(app, client, game):
+    since = cursor(client)
+    for title in ('One', 'Two', 'Three'):
+        client.patch(f"/games/{game['id']}", json={'title': title})
+    before = log_size(app)
+    sync(client, since)
+    assert log_size(app) == before
+
+
+def test_compact_changelog_command(app, client, game):
+    since = cursor(client)
+    for title in ('One', 'Two', 'Three'):
+        client.patch(f"/games/{game['id']}", json={'title': title})
+    before = log_size(app)
+    result = app.test_cli_runner().invoke(args=['compact-changelog'])
+    assert result.exit_code == 0, result.output
+    removed = int(result.output.split()[1])
+    assert removed > 0
+    assert log_size(app) == before - removed
+    change, = [c for c in sync(client, since)['changes'] if c['entity'] == 'game']
+    assert change['data']['title'] == 'Three'
+
+
+class FrozenClock(datetime):
+    at = datetime(2030, 1, 1, 12)
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.at.replace(tzinfo=tz)
+
+
+def test_entries_are_stamped_and_expired_in_utc(app, client, game, monkeypatch):
+    monkeypatch.setattr(models, 'datetime', FrozenClock)
+    client.patch(f"/games/{game['id']}", json={'title': 'Death House'})
+    client.patch(f"/players/{game['players'][0]['id']}", json={'summary': 'Brave'})
+    with app.app_context():
+        stamps = db.session.scalars(select(ChangeLog.created_at).where(ChangeLog.created_at >= FrozenClock.at)).all()
+    assert stamps and set(stamps) == {FrozenClock.at}
+    # One day inside the retention window nothing expires, one day past it everything does
+    retention = timedelta(days=app.config['CHANGE_LOG_RETENTION_DAYS'])
+    monkeypatch.setattr(FrozenClock, 'at', FrozenClock.at + retention - timedelta(days=1))
+    with app.app_context():
+        changelog.compact()
+        assert log_size(app) > 0
+    monkeypatch.setattr(FrozenClock, 'at', FrozenClock.at + timedelta(days=2))
+    with app.app_context():
+        changelog.compact()
+    assert log_size(app) == 0